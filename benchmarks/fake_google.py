@@ -0,0 +1,812 @@
+"""
+Local stand-in for the subset of Drive v3, Docs v1, Slides v1 and YouTube v3 that the
+ppt_agent tools use. Runs in-process on a background thread:
+
+    server = FakeGoogle(latency=0.05).start()
+    google_clients.use_api_endpoint(server.url)
+    ...
+    print(server.stats())
+
+State lives in plain dicts (server.files, server.presentations, server.playlists) so
+benchmarks can seed it directly. Every request is counted per API method together with
+the bytes received and sent; latency and quota errors can be injected.
+"""
+import email
+import hashlib
+import itertools
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+DOC_MIME = "application/vnd.google-apps.document"
+SLIDES_MIME = "application/vnd.google-apps.presentation"
+PPTX_MIME = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+EMU_PER_PT = 12700
+
+
+class ApiError(Exception):
+    def __init__(self, status, message, reason="badRequest", headers=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.reason = reason
+        self.headers = headers or {}
+
+
+# --- partial responses (the `fields` parameter) ---
+
+def parse_fields(spec):
+    """
+    Parse a fields mask such as "nextPageToken,files(id,name),items/snippet(title)" into a
+    nested dict; a None leaf means "the whole value".
+    """
+    tokens = re.findall(r"[A-Za-z0-9_*]+|[,()/]", spec or "")
+    pos = 0
+
+    def merge(tree, path, sub):
+        for name in path[:-1]:
+            node = tree.get(name)
+            if node is None:
+                node = tree[name] = {}
+            tree = node
+        last = path[-1]
+        if sub is None or tree.get(last, {}) is None:
+            tree[last] = None
+        else:
+            tree.setdefault(last, {}).update(sub)
+
+    def parse_list():
+        nonlocal pos
+        tree = {}
+        while pos < len(tokens) and tokens[pos] != ")":
+            path = [tokens[pos]]
+            pos += 1
+            while pos < len(tokens) and tokens[pos] == "/":
+                path.append(tokens[pos + 1])
+                pos += 2
+            sub = None
+            if pos < len(tokens) and tokens[pos] == "(":
+                pos += 1
+                sub = parse_list()
+                pos += 1  # ")"
+            merge(tree, path, sub)
+            if pos < len(tokens) and tokens[pos] == ",":
+                pos += 1
+        return tree
+
+    return parse_list()
+
+
+def apply_fields(value, tree):
+    if tree is None or "*" in tree:
+        return value
+    if isinstance(value, list):
+        return [apply_fields(v, tree) for v in value]
+    if isinstance(value, dict):
+        return {k: apply_fields(value[k], sub) for k, sub in tree.items() if k in value}
+    return value
+
+
+# --- Drive search queries (the `q` parameter) ---
+
+_Q_TOKEN = re.compile(r"\s*(?:(?P<str>'(?:\\.|[^'\\])*')|(?P<op>!=|>=|<=|=|>|<|\(|\))|(?P<word>[A-Za-z_.]+))")
+
+
+def parse_query(q):
+    """
+    Compile the subset of the Drive query language the tools use into a predicate:
+    and/or/not, parentheses, `'x' in parents`, `name contains 'x'`, `trashed=false`,
+    comparisons on name, mimeType and modifiedTime.
+    """
+    tokens = []
+    pos = 0
+    q = q or ""
+    while pos < len(q):
+        m = _Q_TOKEN.match(q, pos)
+        if not m or m.end() == pos:
+            if q[pos:].strip():
+                raise ApiError(400, f"Invalid query: {q}", "invalid")
+            break
+        pos = m.end()
+        if m.group("str") is not None:
+            tokens.append(("str", re.sub(r"\\(.)", r"\1", m.group("str")[1:-1])))
+        elif m.group("op") is not None:
+            tokens.append(("op", m.group("op")))
+        else:
+            tokens.append(("word", m.group("word")))
+    i = 0
+
+    def peek(kind=None, value=None):
+        if i >= len(tokens):
+            return False
+        k, v = tokens[i]
+        return (kind is None or k == kind) and (value is None or v.lower() == value)
+
+    def take():
+        nonlocal i
+        i += 1
+        return tokens[i - 1]
+
+    def expr():
+        left = term()
+        while peek("word", "or"):
+            take()
+            right = term()
+            left = (lambda a, b: lambda f: a(f) or b(f))(left, right)
+        return left
+
+    def term():
+        left = factor()
+        while peek("word", "and"):
+            take()
+            right = factor()
+            left = (lambda a, b: lambda f: a(f) and b(f))(left, right)
+        return left
+
+    def factor():
+        if peek("word", "not"):
+            take()
+            inner = factor()
+            return lambda f: not inner(f)
+        if peek("op", "("):
+            take()
+            inner = expr()
+            take()  # ")"
+            return inner
+        if peek("str"):
+            value = take()[1]
+            take()  # in
+            field = take()[1]
+            return lambda f: value in (f.get(field) or [])
+        field = take()[1]
+        op = take()[1]
+        kind, value = take()
+        if kind == "word":
+            value = value.lower() == "true"
+        if op == "contains":
+            return lambda f: str(value).lower() in str(f.get(field, "")).lower()
+        ops = {
+            "=": lambda a, b: a == b, "!=": lambda a, b: a != b,
+            ">": lambda a, b: a > b, "<": lambda a, b: a < b,
+            ">=": lambda a, b: a >= b, "<=": lambda a, b: a <= b,
+        }
+        return lambda f: ops[op](f.get(field), value)
+
+    if not tokens:
+        return lambda f: True
+    return expr()
+
+
+class FakeGoogle:
+    """
+    In-memory Drive/Docs/Slides/YouTube server.
+
+    latency: seconds added to every request (simulated round-trip).
+    error_rate: probability that a request fails with error_status (quota errors by default).
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, error_status=429, retry_after=1, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.fail_next = 0  # force the next N requests to fail with error_status
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+        self._ids = itertools.count(1)
+        self._clock = itertools.count(1)
+
+        self.files = {}           # id -> Drive file (+ 'content' for text/docs)
+        self.presentations = {}   # id -> Slides presentation JSON
+        self.playlists = {}       # id -> [{'videoId', 'title'}]
+        self.changes = []         # Drive changes feed: list of file ids
+        self.reset_stats()
+        self._server = None
+
+    # --- lifecycle ---
+
+    def start(self, host="127.0.0.1", port=0):
+        handler = type("Handler", (_Handler,), {"fake": self})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    # --- stats ---
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = defaultdict(lambda: {"calls": 0, "bytes_in": 0, "bytes_out": 0, "errors": 0})
+
+    def _record(self, method, bytes_in, bytes_out, error):
+        with self._lock:
+            s = self._stats[method]
+            s["calls"] += 1
+            s["bytes_in"] += bytes_in
+            s["bytes_out"] += bytes_out
+            s["errors"] += int(error)
+
+    def stats(self):
+        """
+        {'calls', 'bytes_in', 'bytes_out', 'errors', 'methods': {api_method: {...}}}
+        """
+        with self._lock:
+            methods = {k: dict(v) for k, v in sorted(self._stats.items())}
+        totals = {key: sum(m[key] for m in methods.values()) for key in ("calls", "bytes_in", "bytes_out", "errors")}
+        return {**totals, "methods": methods}
+
+    # --- seeding helpers ---
+
+    def new_id(self, prefix="f"):
+        return f"{prefix}{next(self._ids):06d}"
+
+    def now(self):
+        # strictly increasing RFC 3339 timestamps
+        tick = next(self._clock)
+        return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(1_700_000_000 + tick)) + ".000Z"
+
+    def add_file(self, name, content="", mime_type=DOC_MIME, parents=None, file_id=None):
+        with self._lock:
+            file_id = file_id or self.new_id()
+            self.files[file_id] = {
+                "id": file_id,
+                "name": name,
+                "mimeType": mime_type,
+                "parents": list(parents or []),
+                "modifiedTime": self.now(),
+                "trashed": False,
+                "content": content,
+            }
+            self.changes.append(file_id)
+            return file_id
+
+    def add_presentation(self, name, slide_count=5, parents=None, file_id=None, width_pt=720, height_pt=405):
+        with self._lock:
+            file_id = self.add_file(name, mime_type=SLIDES_MIME, parents=parents, file_id=file_id)
+            self.presentations[file_id] = {
+                "presentationId": file_id,
+                "title": name,
+                "pageSize": {
+                    "width": {"magnitude": width_pt * EMU_PER_PT, "unit": "EMU"},
+                    "height": {"magnitude": height_pt * EMU_PER_PT, "unit": "EMU"},
+                },
+                "layouts": [
+                    {"objectId": f"{file_id}_title", "layoutProperties": {"name": "TITLE"},
+                     "pageElements": [{"objectId": f"{file_id}_title_ph", "shape": {"placeholder": {"type": "TITLE"}}}]},
+                    {"objectId": f"{file_id}_blank", "layoutProperties": {"name": "BLANK"}, "pageElements": []},
+                ],
+                "slides": [
+                    {"objectId": f"{file_id}_s{i}", "pageElements": []} for i in range(slide_count)
+                ],
+            }
+            return file_id
+
+    def add_playlist(self, playlist_id, titles):
+        with self._lock:
+            self.playlists[playlist_id] = [
+                {"videoId": f"vid{i:04d}", "title": title} for i, title in enumerate(titles)
+            ]
+
+    # --- request handling ---
+
+    def handle(self, method, path, query, headers, body):
+        """
+        Route one request. Returns (status, headers, payload); payload is a dict (JSON) or bytes.
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            fail = self.fail_next > 0 or (self.error_rate and self._random.random() < self.error_rate)
+            if self.fail_next > 0:
+                self.fail_next -= 1
+        if fail:
+            reason = "rateLimitExceeded" if self.error_status in (403, 429) else "backendError"
+            raise ApiError(self.error_status, "Injected error", reason, {"Retry-After": str(self.retry_after)})
+
+        for route_method, pattern, name, func in _ROUTES:
+            if route_method != method:
+                continue
+            m = re.fullmatch(pattern, path)
+            if m:
+                return name, func(self, query, headers, body, *m.groups())
+        raise ApiError(404, f"No route for {method} {path}", "notFound")
+
+    # --- Drive ---
+
+    def _drive_file(self, file_id):
+        f = self.files.get(file_id)
+        if f is None:
+            raise ApiError(404, f"File not found: {file_id}", "notFound")
+        return f
+
+    @staticmethod
+    def _public(f):
+        return {k: v for k, v in f.items() if k != "content"}
+
+    def drive_list(self, query, headers, body):
+        predicate = parse_query(query.get("q", ""))
+        with self._lock:
+            matches = [self._public(f) for f in self.files.values() if predicate(f)]
+        matches.sort(key=lambda f: f["name"])
+        page_size = min(int(query.get("pageSize", 100)), 1000)
+        start = int(query.get("pageToken") or 0)
+        page = matches[start:start + page_size]
+        res = {"kind": "drive#fileList", "files": page}
+        if start + page_size < len(matches):
+            res["nextPageToken"] = str(start + page_size)
+        return 200, {}, res
+
+    def drive_get(self, query, headers, body, file_id):
+        with self._lock:
+            f = self._drive_file(file_id)
+            if query.get("alt") == "media":
+                content = f["content"]
+                data = content if isinstance(content, bytes) else content.encode("utf-8")
+                rng = headers.get("Range")
+                if rng:
+                    m = re.match(r"bytes=(\d+)-(\d*)", rng)
+                    start, end = int(m.group(1)), int(m.group(2) or len(data) - 1)
+                    chunk = data[start:end + 1]
+                    return 206, {
+                        "Content-Type": f["mimeType"],
+                        "Content-Range": f"bytes {start}-{start + len(chunk) - 1}/{len(data)}",
+                    }, chunk
+                return 200, {"Content-Type": f["mimeType"]}, data
+            return 200, {}, self._public(f)
+
+    def drive_export(self, query, headers, body, file_id):
+        with self._lock:
+            f = self._drive_file(file_id)
+            if f["mimeType"] == SLIDES_MIME and query.get("mimeType") == PPTX_MIME:
+                return 200, {"Content-Type": PPTX_MIME}, _pptx_from_presentation(self.presentations[file_id])
+            if f["mimeType"] != DOC_MIME:
+                raise ApiError(403, "Export only supports Docs Editors files.", "fileNotExportable")
+            return 200, {"Content-Type": "text/plain"}, ("\ufeff" + _doc_text(f["content"])).encode("utf-8")
+
+    def drive_create(self, query, headers, body):
+        metadata = json.loads(body or b"{}")
+        return 200, {}, self._create(metadata, "")
+
+    def drive_upload(self, query, headers, body):
+        msg = email.message_from_bytes(
+            b"Content-Type: " + headers.get("Content-Type", "").encode() + b"\r\n\r\n" + body
+        )
+        parts = msg.get_payload()
+        metadata = json.loads(parts[0].get_payload(decode=True))
+        media = parts[1].get_payload(decode=True)
+        media_type = parts[1].get_content_type()
+        if metadata.get("mimeType") == SLIDES_MIME and media_type == PPTX_MIME:
+            # converted PPTX upload: keep the bytes and count the slides roughly
+            file = self._create(metadata, media)
+            with self._lock:
+                self.presentations[file["id"]] = _presentation_from_pptx(file["id"], metadata.get("name"), media)
+            return 200, {}, file
+        if metadata.get("mimeType") == DOC_MIME:
+            media = media.decode("utf-8")
+        return 200, {}, self._create(metadata, media)
+
+    def _create(self, metadata, content):
+        with self._lock:
+            file_id = self.add_file(
+                metadata.get("name", "Untitled"),
+                content=content,
+                mime_type=metadata.get("mimeType", "application/octet-stream"),
+                parents=metadata.get("parents"),
+            )
+            return self._public(self.files[file_id])
+
+    def drive_copy(self, query, headers, body, file_id):
+        metadata = json.loads(body or b"{}")
+        with self._lock:
+            source = self._drive_file(file_id)
+            new_id = self.add_file(
+                metadata.get("name", source["name"]),
+                content=source["content"],
+                mime_type=source["mimeType"],
+                parents=metadata.get("parents", source["parents"]),
+            )
+            if file_id in self.presentations:
+                pres = json.loads(json.dumps(self.presentations[file_id]))
+                pres["presentationId"] = new_id
+                self.presentations[new_id] = pres
+            return 200, {}, self._public(self.files[new_id])
+
+    def drive_update(self, query, headers, body, file_id):
+        metadata = json.loads(body or b"{}")
+        with self._lock:
+            f = self._drive_file(file_id)
+            for key in ("name", "trashed"):
+                if key in metadata:
+                    f[key] = metadata[key]
+            f["modifiedTime"] = self.now()
+            self.changes.append(file_id)
+            return 200, {}, self._public(f)
+
+    def drive_start_token(self, query, headers, body):
+        with self._lock:
+            return 200, {}, {"startPageToken": str(len(self.changes))}
+
+    def drive_changes(self, query, headers, body):
+        start = int(query["pageToken"])
+        page_size = int(query.get("pageSize", 100))
+        with self._lock:
+            ids = self.changes[start:start + page_size]
+            changes = []
+            for file_id in ids:
+                f = self.files.get(file_id)
+                if f is None:
+                    changes.append({"fileId": file_id, "removed": True})
+                else:
+                    changes.append({"fileId": file_id, "removed": False, "file": self._public(f)})
+            res = {"changes": changes}
+            if start + page_size < len(self.changes):
+                res["nextPageToken"] = str(start + page_size)
+            else:
+                res["newStartPageToken"] = str(len(self.changes))
+            return 200, {}, res
+
+    # --- Docs ---
+
+    def docs_get(self, query, headers, body, doc_id):
+        with self._lock:
+            f = self._drive_file(doc_id)
+            return 200, {}, {"documentId": doc_id, "title": f["name"], "body": {"content": _doc_body(f["content"])}}
+
+    def docs_batch_update(self, query, headers, body, doc_id):
+        requests = json.loads(body)["requests"]
+        with self._lock:
+            f = self._drive_file(doc_id)
+            text = _doc_text(f["content"])
+            for req in requests:
+                if "insertText" in req:
+                    index = req["insertText"]["location"]["index"] - 1
+                    text = text[:index] + req["insertText"]["text"] + text[index:]
+                else:
+                    raise ApiError(400, f"Unsupported Docs request: {list(req)}")
+            f["content"] = text
+            f["modifiedTime"] = self.now()
+            self.changes.append(doc_id)
+            return 200, {}, {"documentId": doc_id, "replies": [{} for _ in requests]}
+
+    # --- Slides ---
+
+    def _presentation(self, pres_id):
+        pres = self.presentations.get(pres_id)
+        if pres is None:
+            raise ApiError(404, f"Presentation not found: {pres_id}", "notFound")
+        return pres
+
+    def slides_get(self, query, headers, body, pres_id):
+        with self._lock:
+            return 200, {}, json.loads(json.dumps(self._presentation(pres_id)))
+
+    def slides_batch_update(self, query, headers, body, pres_id):
+        requests = json.loads(body)["requests"]
+        with self._lock:
+            pres = self._presentation(pres_id)
+            # requests are applied atomically: work on a copy
+            work = json.loads(json.dumps(pres))
+            replies = [_apply_slides_request(work, req) for req in requests]
+            self.presentations[pres_id] = work
+            f = self.files.get(pres_id)
+            if f:
+                f["modifiedTime"] = self.now()
+                self.changes.append(pres_id)
+            return 200, {}, {"presentationId": pres_id, "replies": replies}
+
+    # --- YouTube ---
+
+    def youtube_playlist_items(self, query, headers, body):
+        playlist = self.playlists.get(query.get("playlistId"))
+        if playlist is None:
+            raise ApiError(404, "Playlist not found", "playlistNotFound")
+        max_results = min(int(query.get("maxResults", 5)), 50)
+        start = int(query.get("pageToken") or 0)
+        page = playlist[start:start + max_results]
+        items = [
+            {
+                "kind": "youtube#playlistItem",
+                "etag": hashlib.md5(json.dumps(v).encode()).hexdigest(),
+                "id": f"{query.get('playlistId')}.{v['videoId']}",
+                "snippet": {
+                    "title": v["title"],
+                    "description": "Official worship video. " * 20,
+                    "channelTitle": "Worship Channel",
+                    "thumbnails": {size: {"url": f"https://i.ytimg.com/vi/{v['videoId']}/{size}.jpg", "width": 480, "height": 360}
+                                   for size in ("default", "medium", "high", "standard", "maxres")},
+                    "resourceId": {"kind": "youtube#video", "videoId": v["videoId"]},
+                    "position": start + i,
+                },
+            }
+            for i, v in enumerate(page)
+        ]
+        res = {"kind": "youtube#playlistItemListResponse", "items": items,
+               "pageInfo": {"totalResults": len(playlist), "resultsPerPage": max_results}}
+        if start + max_results < len(playlist):
+            res["nextPageToken"] = str(start + max_results)
+        res["etag"] = hashlib.md5(json.dumps(res, sort_keys=True).encode()).hexdigest()
+        if headers.get("If-None-Match") == res["etag"]:
+            return 304, {"ETag": res["etag"]}, b""
+        return 200, {"ETag": res["etag"]}, res
+
+
+def _doc_text(content):
+    if isinstance(content, list):
+        # text/plain export puts every table cell on a line of its own
+        return "\n".join(
+            "\n".join(cell for row in block for cell in row) if isinstance(block, list) else block
+            for block in content
+        )
+    return content.decode("utf-8") if isinstance(content, bytes) else (content or "")
+
+
+def _doc_body(content):
+    """
+    Docs API body for stored text. Stored content may also be a list of blocks:
+    strings are paragraphs, lists of rows are tables.
+    """
+    blocks = content if isinstance(content, list) else _doc_text(content).split("\n")
+    out = []
+    for block in blocks:
+        if isinstance(block, list):
+            out.append({"table": {"tableRows": [
+                {"tableCells": [
+                    {"content": [{"paragraph": {"elements": [{"textRun": {"content": cell + "\n"}}]}}]}
+                    for cell in row
+                ]}
+                for row in block
+            ]}})
+        else:
+            out.append({"paragraph": {"elements": [{"textRun": {"content": block + "\n"}}]}})
+    return out
+
+
+def _presentation_from_pptx(pres_id, name, data):
+    slide_count = len(re.findall(rb"ppt/slides/slide\d+\.xml", data)) // 2 or 1
+    return {
+        "presentationId": pres_id,
+        "title": name,
+        "pageSize": {"width": {"magnitude": 720 * EMU_PER_PT, "unit": "EMU"},
+                     "height": {"magnitude": 405 * EMU_PER_PT, "unit": "EMU"}},
+        "layouts": [],
+        "slides": [{"objectId": f"{pres_id}_s{i}", "pageElements": []} for i in range(slide_count)],
+    }
+
+
+def _pptx_from_presentation(pres):
+    """
+    A .pptx with the page size and slide count of pres (on python-pptx's default layouts).
+    """
+    import io
+    from pptx import Presentation
+
+    prs = Presentation()
+    prs.slide_width = int(pres["pageSize"]["width"]["magnitude"])
+    prs.slide_height = int(pres["pageSize"]["height"]["magnitude"])
+    for _ in pres["slides"]:
+        prs.slides.add_slide(prs.slide_layouts[0])
+    out = io.BytesIO()
+    prs.save(out)
+    return out.getvalue()
+
+
+_OBJECT_ID = re.compile(r"[a-zA-Z0-9_][a-zA-Z0-9_\-:]{4,49}")
+
+
+def _all_object_ids(pres):
+    ids = set()
+    for page in pres["slides"] + pres.get("layouts", []):
+        ids.add(page["objectId"])
+        ids.update(pe["objectId"] for pe in page.get("pageElements", []))
+    return ids
+
+
+def _find_element(pres, object_id):
+    for slide in pres["slides"]:
+        for pe in slide["pageElements"]:
+            if pe["objectId"] == object_id:
+                return slide, pe
+    raise ApiError(400, f"The object ({object_id}) could not be found.")
+
+
+def _find_slide(pres, object_id):
+    for slide in pres["slides"]:
+        if slide["objectId"] == object_id:
+            return slide
+    raise ApiError(400, f"The object ({object_id}) could not be found.")
+
+
+def _check_new_id(pres, object_id):
+    if not _OBJECT_ID.fullmatch(object_id or ""):
+        raise ApiError(400, f"Invalid object ID: {object_id}")
+    if object_id in _all_object_ids(pres):
+        raise ApiError(400, f"The object ID ({object_id}) should be unique among all pages and page elements.")
+
+
+def _shape_text(pe):
+    return pe.setdefault("shape", {}).setdefault("text", {"textElements": []})
+
+
+def _set_text(pe, text):
+    _shape_text(pe)["textElements"] = [{"textRun": {"content": text}}] if text else []
+
+
+def _get_text(pe):
+    return "".join(te.get("textRun", {}).get("content", "") for te in _shape_text(pe)["textElements"])
+
+
+def _apply_slides_request(pres, req):
+    (kind, args), = req.items()
+    if kind == "createSlide":
+        slide_id = args.get("objectId") or f"gen_{len(pres['slides'])}_{random.randrange(1 << 30)}"
+        _check_new_id(pres, slide_id)
+        index = int(args.get("insertionIndex", len(pres["slides"])))
+        if not 0 <= index <= len(pres["slides"]):
+            raise ApiError(400, f"insertionIndex {index} out of range")
+        elements = []
+        layout_id = args.get("slideLayoutReference", {}).get("layoutId")
+        predefined = args.get("slideLayoutReference", {}).get("predefinedLayout")
+        layout = next((l for l in pres.get("layouts", []) if l["objectId"] == layout_id), None)
+        if layout_id and layout is None:
+            raise ApiError(400, f"Layout {layout_id} not found")
+        if layout is None and predefined != "BLANK":
+            # default layout brings placeholders with it
+            elements = [{"objectId": f"{slide_id}_ph{i}", "shape": {"placeholder": {"type": "BODY"}}} for i in range(2)]
+        elif layout is not None:
+            elements = [{"objectId": f"{slide_id}_{pe['objectId']}", "shape": {"placeholder": pe["shape"]["placeholder"]}}
+                        for pe in layout["pageElements"]]
+        pres["slides"].insert(index, {"objectId": slide_id, "pageElements": elements})
+        return {"createSlide": {"objectId": slide_id}}
+    if kind == "createShape":
+        _check_new_id(pres, args["objectId"])
+        slide = _find_slide(pres, args["elementProperties"]["pageObjectId"])
+        slide["pageElements"].append({
+            "objectId": args["objectId"],
+            "size": args["elementProperties"].get("size"),
+            "transform": args["elementProperties"].get("transform"),
+            "shape": {"shapeType": args.get("shapeType"), "text": {"textElements": []}},
+        })
+        return {"createShape": {"objectId": args["objectId"]}}
+    if kind == "insertText":
+        _, pe = _find_element(pres, args["objectId"])
+        text = _get_text(pe)
+        index = int(args.get("insertionIndex", 0))
+        _set_text(pe, text[:index] + args["text"] + text[index:])
+        return {}
+    if kind == "deleteText":
+        _, pe = _find_element(pres, args["objectId"])
+        text_range = args.get("textRange", {"type": "ALL"})
+        if text_range.get("type") == "ALL":
+            _set_text(pe, "")
+        else:
+            text = _get_text(pe)
+            start = int(text_range.get("startIndex", 0))
+            end = int(text_range.get("endIndex", len(text)))
+            _set_text(pe, text[:start] + text[end:])
+        return {}
+    if kind in ("updateTextStyle", "updateParagraphStyle", "updateShapeProperties"):
+        _, pe = _find_element(pres, args["objectId"])
+        pe.setdefault("styles", {})[kind] = args.get("style") or args.get("shapeProperties")
+        return {}
+    if kind == "updatePageProperties":
+        slide = _find_slide(pres, args["objectId"])
+        slide["pageProperties"] = args["pageProperties"]
+        return {}
+    if kind == "deleteObject":
+        object_id = args["objectId"]
+        for i, slide in enumerate(pres["slides"]):
+            if slide["objectId"] == object_id:
+                del pres["slides"][i]
+                return {}
+        slide, pe = _find_element(pres, object_id)
+        slide["pageElements"].remove(pe)
+        return {}
+    if kind == "duplicateObject":
+        object_ids = args.get("objectIds", {})
+        source = _find_slide(pres, args["objectId"])
+        copy = json.loads(json.dumps(source))
+        copy["objectId"] = object_ids.get(source["objectId"]) or f"{source['objectId']}_c{random.randrange(1 << 20)}"
+        _check_new_id(pres, copy["objectId"])
+        for pe in copy["pageElements"]:
+            pe["objectId"] = object_ids.get(pe["objectId"]) or f"{pe['objectId']}_c{random.randrange(1 << 20)}"
+            _check_new_id(pres, pe["objectId"])
+        pres["slides"].insert(pres["slides"].index(source) + 1, copy)
+        return {"duplicateObject": {"objectId": copy["objectId"]}}
+    if kind == "updateSlidesPosition":
+        ids = args["slideObjectIds"]
+        index = int(args["insertionIndex"])
+        moving = [_find_slide(pres, sid) for sid in ids]
+        # insertionIndex is relative to the arrangement before the move
+        before = sum(1 for s in pres["slides"][:index] if s in moving)
+        for s in moving:
+            pres["slides"].remove(s)
+        index -= before
+        pres["slides"][index:index] = moving
+        return {}
+    raise ApiError(400, f"Unsupported Slides request: {kind}")
+
+
+_ROUTES = [
+    ("GET", r"/drive/v3/files", "drive.files.list", FakeGoogle.drive_list),
+    ("POST", r"/drive/v3/files", "drive.files.create", FakeGoogle.drive_create),
+    ("POST", r"/upload/drive/v3/files", "drive.files.create(upload)", FakeGoogle.drive_upload),
+    ("GET", r"/drive/v3/files/([^/]+)/export", "drive.files.export", FakeGoogle.drive_export),
+    ("POST", r"/drive/v3/files/([^/]+)/copy", "drive.files.copy", FakeGoogle.drive_copy),
+    ("GET", r"/drive/v3/files/([^/]+)", "drive.files.get", FakeGoogle.drive_get),
+    ("PATCH", r"/drive/v3/files/([^/]+)", "drive.files.update", FakeGoogle.drive_update),
+    ("GET", r"/drive/v3/changes/startPageToken", "drive.changes.getStartPageToken", FakeGoogle.drive_start_token),
+    ("GET", r"/drive/v3/changes", "drive.changes.list", FakeGoogle.drive_changes),
+    ("GET", r"/v1/documents/([^/:]+)", "docs.documents.get", FakeGoogle.docs_get),
+    ("POST", r"/v1/documents/([^/:]+):batchUpdate", "docs.documents.batchUpdate", FakeGoogle.docs_batch_update),
+    ("GET", r"/v1/presentations/([^/:]+)", "slides.presentations.get", FakeGoogle.slides_get),
+    ("POST", r"/v1/presentations/([^/:]+):batchUpdate", "slides.presentations.batchUpdate", FakeGoogle.slides_batch_update),
+    ("GET", r"/youtube/v3/playlistItems", "youtube.playlistItems.list", FakeGoogle.youtube_playlist_items),
+]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    fake = None  # set by FakeGoogle.start
+
+    def log_message(self, format, *args):
+        pass
+
+    def _serve(self, method):
+        parsed = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(parsed.query))
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        path = urllib.parse.unquote(parsed.path)
+
+        name = f"{method} {parsed.path}"
+        extra = {}
+        try:
+            name, (status, extra, payload) = self.fake.handle(method, path, query, self.headers, body)
+            if isinstance(payload, dict):
+                payload = apply_fields(payload, parse_fields(query["fields"]) if "fields" in query else None)
+                data = json.dumps(payload).encode("utf-8")
+                content_type = "application/json; charset=UTF-8"
+            else:
+                data = payload
+                content_type = extra.pop("Content-Type", "application/octet-stream")
+        except ApiError as e:
+            status = e.status
+            extra = dict(e.headers)
+            data = json.dumps({"error": {"code": e.status, "message": e.message,
+                                         "errors": [{"reason": e.reason, "message": e.message}]}}).encode("utf-8")
+            content_type = "application/json; charset=UTF-8"
+
+        self.fake._record(name, len(body), len(data), status >= 400)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in extra.items():
+            self.send_header(key, value)
+        self.end_headers()
+        if data and status != 304:
+            self.wfile.write(data)
+
+    def do_GET(self):
+        self._serve("GET")
+
+    def do_POST(self):
+        self._serve("POST")
+
+    def do_PATCH(self):
+        self._serve("PATCH")
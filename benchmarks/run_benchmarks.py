@@ -0,0 +1,154 @@
+"""
+Offline benchmarks for the ppt_agent tools, run against benchmarks.fake_google.
+
+    python -m benchmarks.run_benchmarks [--latency 0.05] [--json results.json]
+
+Each scenario reports the API calls made, bytes sent/received and wall time, so a change that
+adds round-trips or transfer shows up before it reaches a Sunday service.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_google import FakeGoogle
+
+
+LYRICS_FOLDER_ID = "1hiSf6DSAO2RIv7ZCT7ltU8uBYQFvaOQu"
+PLAYLIST_ID = "PLbenchmark"
+FOLDER_SIZE = 500
+SET_SIZE = 6
+DECK_SLIDES = 120
+
+_KOREAN_WORDS = ["주님", "은혜", "사랑", "나의", "영원히", "찬양", "하리", "십자가", "보혈", "예수", "거룩", "하나님", "빛", "생명"]
+_ENGLISH_WORDS = ["Lord", "grace", "love", "my", "forever", "praise", "holy", "cross", "blood", "Jesus", "light", "life", "King"]
+
+
+def song_lyrics(rng, sections=4, lines_per_section=4):
+    english, korean = [], []
+    for s in range(sections):
+        label = "Chorus" if s % 2 else f"Verse {s // 2 + 1}"
+        english.append(f"[{label}]")
+        korean.append(f"[{label}]")
+        for _ in range(lines_per_section):
+            english.append(" ".join(rng.choice(_ENGLISH_WORDS) for _ in range(6)))
+            korean.append(" ".join(rng.choice(_KOREAN_WORDS) for _ in range(4)))
+        english.append("")
+        korean.append("")
+    return "\n".join(english), "\n".join(korean)
+
+
+def seed(fake, rng):
+    """
+    A 500-file lyrics folder, both service templates, and a 6-song playlist.
+    Returns the (korean, english) titles of the set.
+    """
+    from ppt_agent.agents import slide_creator_agent
+
+    titles = []
+    for i in range(FOLDER_SIZE):
+        korean_title = " ".join(rng.choice(_KOREAN_WORDS) for _ in range(2)) + f" {i}"
+        english_title = " ".join(rng.choice(_ENGLISH_WORDS) for _ in range(2)).title() + f" {i}"
+        english, korean = song_lyrics(rng)
+        text = f"English Title: {english_title}\n{english}\n\nKorean Title: {korean_title}\n{korean}"
+        fake.add_file(f"{korean_title} / {english_title}", text, parents=[LYRICS_FOLDER_ID])
+        titles.append((korean_title, english_title))
+
+    for template_id in (slide_creator_agent.TEMPLATE_SUNDAY_PRESENTATION_ID,
+                        slide_creator_agent.TEMPLATE_FRIDAY_PRESENTATION_ID):
+        fake.add_presentation("Template", slide_count=6, file_id=template_id)
+
+    chosen = rng.sample(titles, SET_SIZE)
+    fake.add_playlist(PLAYLIST_ID, [f"[Official MV] {k} | Worship Channel" for k, _ in chosen])
+    return chosen
+
+
+def run_scenario(fake, name, func):
+    fake.reset_stats()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    stats = fake.stats()
+    row = {
+        "scenario": name,
+        "calls": stats["calls"],
+        "bytes_sent": stats["bytes_in"],
+        "bytes_received": stats["bytes_out"],
+        "errors": stats["errors"],
+        "wall_s": round(elapsed, 3),
+        "methods": {k: v["calls"] for k, v in stats["methods"].items()},
+    }
+    return row, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated round-trip per request (s)")
+    parser.add_argument("--json", help="write the results to this file as JSON")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="ppt_agent_bench_")
+    rng = random.Random(1248)
+
+    fake = FakeGoogle(latency=args.latency).start()
+    from ppt_agent import build_journal, google_clients, llm_cache, lyric_store, lyrics_index, lyrics_mirror, tracing
+    from ppt_agent.agents import lyric_retriever_agent as retriever
+    from ppt_agent.agents import slide_creator_agent as creator
+
+    google_clients.use_api_endpoint(fake.url)
+    lyrics_index.INDEX_FILE = os.path.join(workdir, "lyrics_index.sqlite3")
+    build_journal.JOURNAL_FILE = os.path.join(workdir, "builds.sqlite3")
+    lyric_store.STORE_FILE = os.path.join(workdir, "lyric_store.sqlite3")
+    creator.TEMPLATE_CACHE_DIR = os.path.join(workdir, "templates")
+    lyrics_mirror.MIRROR_DIR = os.path.join(workdir, "mirror")
+    llm_cache.CACHE_FILE = os.path.join(workdir, "llm_cache.sqlite3")
+    tracing.TRACE_FILE = os.path.join(workdir, "traces.jsonl")
+
+    chosen = seed(fake, rng)
+    pairs = [{"english": f"Line {i} in English\nsecond line", "korean": f"{i}번째 줄\n둘째 줄"} for i in range(DECK_SLIDES)]
+    new_songs = []
+    for i in range(SET_SIZE):
+        english, korean = song_lyrics(rng)
+        new_songs.append({"korean_title": f"새 노래 {i}", "english_title": f"New Song {i}",
+                          "english_lyrics": english, "korean_lyrics": korean})
+
+    def lookup_set():
+        return [retriever.find_files_by_name(title) for pair in chosen for title in pair]
+
+    scenarios = [
+        ("preview_youtube_playlist (cold)", lambda: retriever.preview_youtube_playlist(PLAYLIST_ID)),
+        ("preview_youtube_playlist (repeat)", lambda: retriever.preview_youtube_playlist(PLAYLIST_ID)),
+        (f"find_files_by_name x{2 * SET_SIZE} (cold, {FOLDER_SIZE}-file folder)", lookup_set),
+        (f"find_files_by_name x{2 * SET_SIZE} (warm)", lookup_set),
+        (f"drive_save_lyrics ({SET_SIZE} songs)", lambda: retriever.drive_save_lyrics(new_songs)),
+        (f"create_presentation ({DECK_SLIDES} slides)", lambda: creator.create_presentation(pairs)),
+        (f"create_presentation engine=pptx ({DECK_SLIDES} slides)",
+         lambda: creator.create_presentation(pairs, engine="pptx")),
+    ]
+
+    rows = []
+    try:
+        for name, func in scenarios:
+            row, _ = run_scenario(fake, name, func)
+            rows.append(row)
+    finally:
+        fake.stop()
+
+    width = max(len(r["scenario"]) for r in rows)
+    print()
+    print(f"{'scenario':<{width}}  {'calls':>6}  {'sent':>10}  {'received':>10}  {'errors':>6}  {'wall s':>7}")
+    for r in rows:
+        print(f"{r['scenario']:<{width}}  {r['calls']:>6}  {r['bytes_sent']:>10}  {r['bytes_received']:>10}  "
+              f"{r['errors']:>6}  {r['wall_s']:>7}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"latency": args.latency, "results": rows}, f, indent=2)
+    return rows
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,72 @@
+"""
+Cold-start benchmark: how long a fresh interpreter takes to import each entry point and to build
+its first API clients.
+
+    python -m benchmarks.startup [--repeat 5] [--json startup.json]
+
+Every sample runs in a new process, so nothing is shared with earlier imports (the OS file cache
+still is; the first sample is reported separately). `adk web` pays for ppt_agent.agent, the
+uvicorn fallback of run.command for ppt_agent.app.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+
+ENTRY_POINTS = ["ppt_agent", "ppt_agent.app", "ppt_agent.batch", "ppt_agent.pipeline", "ppt_agent.agent"]
+
+_IMPORT = """
+import sys, time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start, "google.adk" in sys.modules)
+"""
+
+_CLIENTS = """
+import time
+from ppt_agent import google_clients
+google_clients.use_api_endpoint("http://127.0.0.1:9/")  # anonymous credentials, no token.json needed
+start = time.perf_counter()
+for api, version in (("drive", "v3"), ("docs", "v1"), ("slides", "v1"), ("youtube", "v3")):
+    google_clients.get_service(api, version)
+print(time.perf_counter() - start, False)
+"""
+
+
+def _sample(code: str):
+    out = subprocess.run([sys.executable, "-W", "ignore", "-c", code], capture_output=True, text=True, check=True)
+    seconds, adk = out.stdout.split()
+    return float(seconds), adk == "True"
+
+
+def measure(code: str, repeat: int):
+    first, adk = _sample(code)
+    rest = [_sample(code)[0] for _ in range(repeat)]
+    return {"first_s": round(first, 3), "median_s": round(statistics.median(rest), 3), "loads_adk": adk}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--repeat", type=int, default=5, help="warm samples per entry point")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for module in ENTRY_POINTS:
+        results[f"import {module}"] = measure(_IMPORT.format(module=module), args.repeat)
+    results["first clients (drive, docs, slides, youtube)"] = measure(_CLIENTS, args.repeat)
+
+    width = max(len(name) for name in results)
+    print(f"{'':{width}}  {'first':>8}  {'median':>8}  adk")
+    for name, r in results.items():
+        print(f"{name:{width}}  {r['first_s']:>7.3f}s  {r['median_s']:>7.3f}s  {'yes' if r['loads_adk'] else 'no'}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
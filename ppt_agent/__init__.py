@@ -1 +1,9 @@
-from . import agent
+import importlib
+
+
+def __getattr__(name):
+    # `adk web` imports ppt_agent.agent by itself; importing it here (and with it the ADK) would
+    # slow down everything else that only needs the tools, like the HTTP app and the batch command
+    if name == "agent":
+        return importlib.import_module(".agent", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
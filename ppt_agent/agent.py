@@ -3,6 +3,7 @@ from google.adk.tools.agent_tool import AgentTool
 from .agents.lyric_retriever_agent import lyric_retriever_agent as LyricRetrieverAgent
 from .agents.slide_creator_agent import slide_creator_agent as SlideCreatorAgent
 from google.genai.types import GenerateContentConfig
+from . import tracing
 
 
 root_agent = Agent(
@@ -20,7 +21,9 @@ root_agent = Agent(
         The Lyric Retriever Agent is specialized in retrieving lyrics from Google Drive based on worship song titles provided by the user.
         If the lyrics are not found in Google Drive, it will ask you to provide the lyrics which you will then ask the user to provide.
         
-        The Slide Creator Agent is specialized in creating PowerPoint slides from a JSON string containing English and Korean lyric pairs.
+        The Lyric Retriever Agent stores the aligned lyrics and returns a short lyrics handle (e.g. "lyr_1a2b3c4d5e6f") instead of the lyrics themselves.
+        The Slide Creator Agent is specialized in creating PowerPoint slides from such a handle, which refers to the English and Korean lyric pairs of all songs.
+        Never copy lyrics between the agents - pass the handle.
         Ensure you are only building one presentation file with all the slides included.
         
         
@@ -29,8 +32,8 @@ root_agent = Agent(
         2. Then use the LyricRetrieverAgent to fetch the full lyrics for each song in both Korean and English - first, by checking if the lyrics
         	already exist in Google Drive, and if not, request the user to provide the lyrics. If multiple songs are found in the google drive, ask the user to select which one. Input the chosen song to the LyricRetrieverAgent.
             Make sure you're asking the user for lyrics for all songs that are missing. Sometimes the user won't be able to provide lyrics for both languages. If the user only provides one, you can use the Lyric Retriever Agent to translate the missing version.
-		3. Then parse the file path to the JSON file and call the Slide Creator Agent which will accept the JSON string and convert it to a list of {"english", "korean"} pairs. Ensure you use the correct template based on whether it's a Friday or Sunday service.
-			Do not use the Slide Creator Agent until you have the full JSON string ready with all the songs' lyrics.
+		3. Then call the Slide Creator Agent with the lyrics handle returned by the Lyric Retriever Agent (exactly as returned) and whether it is a Friday or Sunday service, so it uses the correct template.
+			Do not use the Slide Creator Agent until you have the handle for the whole set, covering all the songs' lyrics.
 		4. Output the final PowerPoint presentation file once all slides have been created including the URL link to the presentation.
         
         
@@ -38,6 +41,9 @@ root_agent = Agent(
 	generate_content_config = GenerateContentConfig(
 		temperature=0.01,
 	),
+	before_agent_callback=tracing.bind_root_invocation,
+	before_model_callback=tracing.before_model,
+	after_model_callback=tracing.after_model,
 	tools = [
 		AgentTool(LyricRetrieverAgent),
 		AgentTool(SlideCreatorAgent)
@@ -1,5 +1,4 @@
 from google.adk.agents import Agent
-import pandas as pd
 from google.genai.types import GenerateContentConfig
 
 lyric_retriever_agent = Agent(
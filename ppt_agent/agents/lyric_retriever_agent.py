@@ -1,64 +1,36 @@
 from __future__ import print_function
-from google.adk.agents import Agent
-import pandas as pd
-from google.genai.types import GenerateContentConfig
-import os.path
-import datetime
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+import google.auth.exceptions
+import httplib2
 import uuid
-from google.adk.agents import Agent
-import json
-import os
 import re
-from pathlib import Path
-from typing import List, Optional, Tuple
 import logging
-import html
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaIoBaseDownload
+from googleapiclient.http import MediaIoBaseDownload, MediaIoBaseUpload
 import io
-from typing import List, Dict, Optional, Any
-
+from typing import List, Dict, Optional, Any, Tuple
+from ..google_clients import HTTP_TIMEOUT, LOOKUP_TIMEOUT, MAX_RETRIES, execute, get_service, throttle
+from .. import tracing
+from .. import lyric_store, lyrics_index, lyrics_mirror
+from ..title_matcher import TitleMatcher
+from ..lyric_translator import song_pairs, translate
+from concurrent.futures import ThreadPoolExecutor
 
 
+IO_WORKERS = 8  # parallel Drive downloads/uploads when several lyric files are handled at once
+MAX_FILE_BYTES = 256 * 1024  # per-file cap; lyric sheets are a few KB
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+MAX_QUERY_CHARS = 2000  # combined files.list queries are split to stay well under URL length limits
 
-# Scopes: Drive, Docs, YouTube (as you used before)
-SCOPES = [
-    "https://www.googleapis.com/auth/drive",
-    "https://www.googleapis.com/auth/youtube.force-ssl",
-]
+_pool: Optional[ThreadPoolExecutor] = None
 
-TOKEN_FILE = "./ppt_agent/token.json"
-CREDENTIALS_FILE = "./ppt_agent/credentials.json"
+# only the fields preview_youtube_playlist returns, plus the etag used to revalidate
+PLAYLIST_ITEM_FIELDS = "etag,nextPageToken,items(snippet(title,resourceId/videoId))"
+# (playlist_id, page_token) -> {'etag', 'videos', 'next_page_token'}
+_playlist_pages: Dict[Tuple[str, Optional[str]], Dict[str, Any]] = {}
+# folder_id -> (changes token of the index it was built from, matcher over the folder's names)
+_matchers: Dict[str, Tuple[Optional[str], TitleMatcher]] = {}
 
 
-def get_credentials(scopes=SCOPES) -> Credentials:
-    """
-    Obtain OAuth2 credentials, refreshing or running a local flow if needed.
-    Returns valid Credentials instance.
-    """
-    creds = None
-    if os.path.exists(TOKEN_FILE):
-        creds = Credentials.from_authorized_user_file(TOKEN_FILE, scopes)
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            if not os.path.exists(CREDENTIALS_FILE):
-                raise FileNotFoundError(f"OAuth credentials file not found: {CREDENTIALS_FILE}")
-            flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_FILE, scopes)
-            creds = flow.run_local_server(port=0)
-        with open(TOKEN_FILE, "w", encoding="utf-8") as token:
-            token.write(creds.to_json())
-    return creds
 
 
 def normalize(text: str) -> str:
@@ -74,30 +46,50 @@ def normalize(text: str) -> str:
     return cleaned
 
 
+@tracing.traced
 def preview_youtube_playlist(playlist_id: str):
     """
     Fetch a YouTube playlist and return list of {'video_id', 'title'}.
+    Pages are cached per playlist and revalidated with their ETag, so re-checking an
+    unchanged playlist costs a 304 per page instead of a full listing.
     """
-    creds = get_credentials()
-    youtube = build("youtube", "v3", credentials=creds)
+    youtube = get_service("youtube", "v3")
 
     videos: List[Dict[str, str]] = []
     next_page_token = None
 
     try:
         while True:
+            key = (playlist_id, next_page_token)
+            cached = _playlist_pages.get(key)
             req = youtube.playlistItems().list(
                 part="snippet",
                 playlistId=playlist_id,
                 maxResults=50,
                 pageToken=next_page_token,
+                fields=PLAYLIST_ITEM_FIELDS,
             )
-            res = req.execute()
-            for item in res.get("items", []):
-                vid = item["snippet"]["resourceId"].get("videoId")
-                title = item["snippet"].get("title", "")
-                videos.append({"video_id": vid, "title": title})
-            next_page_token = res.get("nextPageToken")
+            if cached:
+                req.headers["If-None-Match"] = cached["etag"]
+            try:
+                res = execute(req)
+                page = {
+                    "etag": res.get("etag"),
+                    "videos": [
+                        {"video_id": item["snippet"]["resourceId"].get("videoId"), "title": item["snippet"].get("title", "")}
+                        for item in res.get("items", [])
+                    ],
+                    "next_page_token": res.get("nextPageToken"),
+                }
+                if page["etag"]:
+                    _playlist_pages[key] = page
+            except HttpError as e:
+                if not (cached and e.resp.status == 304):
+                    raise
+                # not modified: reuse the cached page
+                page = cached
+            videos.extend(page["videos"])
+            next_page_token = page["next_page_token"]
             if not next_page_token:
                 break
         return videos
@@ -106,117 +98,542 @@ def preview_youtube_playlist(playlist_id: str):
         return None
 
 
-def read_google_doc(docs_service, document_id: str):
-    """
-    Read a Google Doc's textual content and return plain text.
-    """
-    doc = docs_service.documents().get(documentId=document_id).execute()
-    body = doc.get("body", {}).get("content", [])
-    out = []
-    for structural_element in body:
-        # Paragraphs and tables can contain text runs
-        paragraph = structural_element.get("paragraph")
-        if paragraph:
-            text_run_parts = []
-            for el in paragraph.get("elements", []):
-                tr = el.get("textRun")
-                if tr and tr.get("content"):
-                    text_run_parts.append(tr["content"])
-            if text_run_parts:
-                out.append("".join(text_run_parts))
-        # You could expand to table cells etc. if needed
+def _paragraph_text(paragraph: Dict) -> str:
+    return "".join(el.get("textRun", {}).get("content", "") for el in paragraph.get("elements", []))
+
+
+def _structural_text(elements: List[Dict], out: List[str]):
+    """
+    Collect the text of Docs structural elements: paragraphs, and table cells one after the
+    other, row by row (cells hold structural elements themselves, so nested tables work too).
+    """
+    for element in elements:
+        if "paragraph" in element:
+            text = _paragraph_text(element["paragraph"])
+            if text:
+                out.append(text.rstrip("\n"))
+        elif "table" in element:
+            for row in element["table"].get("tableRows", []):
+                for cell in row.get("tableCells", []):
+                    _structural_text(cell.get("content", []), out)
+        elif "tableOfContents" in element:
+            _structural_text(element["tableOfContents"].get("content", []), out)
+
+
+def read_google_doc(docs_service, document_id: str, retries: int = MAX_RETRIES):
+    """
+    Read a Google Doc's textual content through the Docs API and return plain text,
+    including the text inside tables. read_drive_file only falls back to this when the
+    Drive text export fails.
+    """
+    doc = execute(docs_service.documents().get(
+        documentId=document_id,
+        fields="body(content(paragraph(elements(textRun(content))),table,tableOfContents))",
+    ), retries=retries)
+    out: List[str] = []
+    _structural_text(doc.get("body", {}).get("content", []), out)
     return "\n".join(out).strip()
 
 
-def read_drive_file(drive_service, file_id: str, mime_type: Optional[str]):
+def _download(request, max_bytes: int, span_name: str, retries: int = MAX_RETRIES) -> Tuple[bytes, bool]:
+    """
+    Stream a media request in chunks, stopping at max_bytes. Returns (data, complete).
+    """
+    fh = io.BytesIO()
+    downloader = MediaIoBaseDownload(fh, request, chunksize=min(max_bytes, DOWNLOAD_CHUNK_BYTES))
+    done = False
+    with tracing.span(span_name, kind="api", retries=0, quota_errors=0, response_bytes=0):
+        while not done and fh.tell() < max_bytes:
+            throttle(span_name)
+            status, done = downloader.next_chunk(num_retries=retries)
+    data = fh.getvalue()
+    # an export that ignores Range returns the whole file in one chunk, past max_bytes
+    return data[:max_bytes], done and len(data) <= max_bytes
+
+
+def _decode(data: bytes, complete: bool) -> str:
+    if not complete:
+        return data.decode("utf-8-sig", errors="ignore")
+    try:
+        # utf-8-sig also drops the byte order mark Drive puts in front of text exports
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return data.decode("latin-1", errors="ignore")
+
+
+def read_drive_file(
+    drive_service, file_id: str, mime_type: Optional[str], max_bytes: int = MAX_FILE_BYTES, retries: int = MAX_RETRIES
+):
     """
     Read a file from Drive:
-    - If Google Doc, use Docs API (caller must provide credentials or build docs_service separately).
-    - If text/plain, download raw media.
+    - If Google Doc, stream its text/plain export (table cells included); if the export
+      fails, read the document through the Docs API instead.
+    - Otherwise, download raw media.
+    Content beyond max_bytes is dropped; lyric files are a few KB, so anything larger is not a lyric sheet.
+    Callers cache the result by file id and modifiedTime (lyrics_index).
     """
     if mime_type == "application/vnd.google-apps.document":
-        docs_service = build("docs", "v1", credentials=get_credentials())
-        return read_google_doc(docs_service, file_id)
-    else:
-        # Attempt to download file contents (works for .txt and other binary types; we decode as utf-8)
         try:
-            request = drive_service.files().get_media(fileId=file_id)
-            fh = io.BytesIO()
-            downloader = MediaIoBaseDownload(fh, request)
-            done = False
-            while not done:
-                status, done = downloader.next_chunk()
-            fh.seek(0)
-            data = fh.read()
-            # try decode, fallback to latin-1 if necessary
-            try:
-                return data.decode("utf-8")
-            except UnicodeDecodeError:
-                try:
-                    return data.decode("utf-8-sig")
-                except Exception:
-                    return data.decode("latin-1", errors="ignore")
+            data, complete = _download(
+                drive_service.files().export_media(fileId=file_id, mimeType="text/plain"),
+                max_bytes, "drive.files.export", retries,
+            )
         except HttpError as e:
-            logging.error(f"Error downloading file {file_id}: {e}")
-            return None
+            logging.warning(f"Text export of {file_id} failed ({e}); reading it through the Docs API")
+            return read_google_doc(get_service("docs", "v1"), file_id, retries)[:max_bytes]
+        if not complete:
+            logging.warning(f"File {file_id} exceeds {max_bytes} bytes; content truncated")
+        # export uses CRLF line endings
+        return _decode(data, complete).replace("\r\n", "\n").strip()
+
+    # Attempt to download file contents (works for .txt and other binary types; we decode as utf-8)
+    try:
+        data, complete = _download(
+            drive_service.files().get_media(fileId=file_id), max_bytes, "drive.files.get_media", retries
+        )
+    except HttpError as e:
+        logging.error(f"Error downloading file {file_id}: {e}")
+        return None
+    if not complete:
+        logging.warning(f"File {file_id} exceeds {max_bytes} bytes; content truncated")
+    return _decode(data, complete)
 
 
-def find_files_by_name(
-    search_name: str, folder_id: str = '1hiSf6DSAO2RIv7ZCT7ltU8uBYQFvaOQu', page_size: int = 20
-):
+# raised when Drive cannot be reached at all, as opposed to an API error
+_CONNECTION_ERRORS = (OSError, httplib2.HttpLib2Error, google.auth.exceptions.TransportError)
+_NO_LOCAL_COPY = ("Google Drive is unreachable and the lyrics folder has no local copy yet "
+                  "(lyrics may exist, try again later)")
+
+
+def _drive_error(e: Exception, during: str) -> Dict[str, str]:
     """
-    Find files in Google Drive that match a search string.
-    Returns list of file dicts: [{'id','name','mimeType','snippet'(optional)}...]
-    Tries name contains to match content inside Google Docs.
+    The {'error': ...} a tool returns when Drive failed, so the agent does not take it for missing lyrics.
     """
-    creds = get_credentials()
-    drive_service = build("drive", "v3", credentials=creds)
+    if isinstance(e, _CONNECTION_ERRORS):
+        lyrics_mirror.mark_offline()
+        logging.error(f"Drive is unreachable {during}: {e}")
+        return {"error": f"Google Drive is unreachable {during} (lyrics may exist, try again later): {e}"}
+    logging.error(f"Drive API error {during}: {e}")
+    return {"error": f"Drive API error {during} (lyrics may exist, try again later): {e}"}
+
+
+def _drive(fail_fast: bool):
+    # get_service hands each pool thread its own client and connection
+    return get_service("drive", "v3", timeout=LOOKUP_TIMEOUT if fail_fast else HTTP_TIMEOUT)
+
+
+def _fetch_one(item: Dict, folder_id: str, use_mirror: bool = True) -> Optional[str]:
+    content = lyrics_index.get_content(item["id"], item.get("modifiedTime"))
+    mirror = lyrics_mirror.open_mirror(folder_id) if use_mirror else None
+    if content is None and mirror is not None:
+        content = mirror.text(item["id"], item.get("modifiedTime"))
+    if content is not None:
+        return content
+    if not lyrics_mirror.offline():
+        # with a mirrored copy to fall back on, one failed attempt is enough
+        fail_fast = mirror is not None and mirror.entry(item["id"]) is not None
+        try:
+            content = read_drive_file(
+                _drive(fail_fast), item["id"], item.get("mimeType"), retries=0 if fail_fast else MAX_RETRIES
+            )
+        except Exception as e:
+            if isinstance(e, _CONNECTION_ERRORS):
+                lyrics_mirror.mark_offline()
+            logging.warning(f"Could not read content for {item['id']}: {e}")
+        if content is not None:
+            lyrics_index.store_file(folder_id, item, content)
+            return content
+    if mirror is not None:
+        # an older copy beats no lyrics at all
+        content = mirror.text(item["id"])
+        if content is not None:
+            logging.warning(f"Serving {item['id']} from the offline mirror; it may be out of date")
+    return content
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="lyrics-io")
+    return _pool
+
+
+def fetch_contents(items: List[Dict], folder_id: str, use_mirror: bool = True) -> List[Optional[str]]:
+    """
+    Fetch the text of several Drive files in parallel (cached text is reused).
+    items are file dicts with 'id', 'mimeType' and 'modifiedTime'; results keep their order.
+    With use_mirror, the offline mirror answers for files it holds at that modifiedTime, and
+    for any file Drive cannot deliver.
+    """
+    if len(items) <= 1:
+        return [_fetch_one(item, folder_id, use_mirror) for item in items]
+    futures = [_get_pool().submit(tracing.propagate(_fetch_one), item, folder_id, use_mirror) for item in items]
+    return [future.result() for future in futures]
 
-    clean = normalize(search_name)
-    # Build query safely. Use either name or fullText match
+
+def _sync_index(folder_id: str):
+    """
+    Bring the lyrics index up to date, or seed it from the offline mirror when it has never
+    synced. Drive errors are logged; lookups keep serving from what the index holds.
+    """
+    lyrics_mirror.seed_index(folder_id)
+    if lyrics_mirror.offline():
+        return
+    # once the index holds the folder, a lookup doesn't wait out retries for a fresher copy
+    fail_fast = lyrics_index.is_synced(folder_id)
+    try:
+        lyrics_index.sync(_drive(fail_fast), folder_id, retries=0 if fail_fast else MAX_RETRIES)
+    except HttpError as e:
+        logging.warning(f"Could not sync lyrics index: {e}")
+    except _CONNECTION_ERRORS as e:
+        lyrics_mirror.mark_offline()
+        logging.warning(f"Drive is unreachable, serving lyrics from the local index and mirror: {e}")
+
+
+def _list_all(drive_service, query: str, limit: Optional[int] = None) -> List[Dict]:
+    """
+    files.list for query, following nextPageToken until the listing ends (or limit files are in).
+    """
+    files: List[Dict] = []
+    page_token = None
+    while True:
+        results = execute(drive_service.files().list(
+            q=query,
+            spaces="drive",
+            fields="nextPageToken, files(id, name, mimeType, modifiedTime)",
+            pageSize=min(limit, 1000) if limit else 1000,
+            pageToken=page_token,
+        ))
+        files.extend(results.get("files", []))
+        page_token = results.get("nextPageToken")
+        # Drive may return short pages mid-listing, so only the token says when it is done
+        if not page_token or (limit and len(files) >= limit):
+            return files[:limit] if limit else files
+
+
+def _name_clause(clean: str) -> str:
+    # escape single quotes by replacing with \'
+    return "name contains '{}'".format(clean.replace("\\", "\\\\").replace("'", "\\'"))
+
+
+def _search_drive(drive_service, clean: str, folder_id: str, page_size: int):
+    """
+    Live Drive search, used until the local lyrics index has been synced once.
+    """
     q_parts = []
     if clean:
-        # escape single quotes by replacing with \'
-        clean_escaped = clean.replace("'", "\\'")
-        q_parts.append(f"name contains '{clean_escaped}'")
-    else:
-        q_parts.append("trashed=false")
-
+        q_parts.append(_name_clause(clean))
     q_parts.append("trashed=false")
     if folder_id:
         q_parts.append(f"'{folder_id}' in parents")
 
-    query = " and ".join(q_parts)
+    return _list_all(drive_service, " and ".join(q_parts), limit=page_size)
+
+
+def _search_drive_many(drive_service, cleans: List[str], folder_id: str) -> Dict[str, List[Dict]]:
+    """
+    Live Drive search for several names at once: one files.list query per chunk of names
+    ("name contains 'a' or name contains 'b' ..."), kept under MAX_QUERY_CHARS and paged to
+    the end. Files are mapped back to every name they contain.
+    """
+    scope = "trashed=false" + (f" and '{folder_id}' in parents" if folder_id else "")
+
+    def query(chunk):
+        return f"{scope} and ({' or '.join(_name_clause(t) for t in chunk)})"
+
+    terms = list(dict.fromkeys(c for c in cleans if c))
+    chunks: List[List[str]] = []
+    for term in terms:
+        if chunks and len(query(chunks[-1] + [term])) <= MAX_QUERY_CHARS:
+            chunks[-1].append(term)
+        else:
+            chunks.append([term])
+
+    found: Dict[str, List[Dict]] = {term: [] for term in terms}
+    for chunk in chunks:
+        for file in _list_all(drive_service, query(chunk)):
+            name = normalize(file.get("name", "")).casefold()
+            for term in chunk:
+                if term.casefold() in name:
+                    found[term].append(file)
+    return found
+
+
+@tracing.traced
+def find_files_by_name(
+    search_name: str,
+    folder_id: str = '1hiSf6DSAO2RIv7ZCT7ltU8uBYQFvaOQu',
+    page_size: int = 20,
+    include_content: bool = True,
+):
+    """
+    Find files in Google Drive that match a search string.
+    Returns list of file dicts: [{'id','name','mimeType','content'}...], None when nothing
+    matches, or {'error': ...} when Drive could not be searched (not the same as "not found").
+    Names are matched against the local lyrics index, which is kept in sync with the
+    Drive folder; only files changed since they were last read are downloaded again.
+    Without network, names and content come from the index and the offline mirror.
+    With include_content=False only names and ids are returned (no downloads); load the
+    chosen files afterwards with read_lyrics_files.
+    """
+    clean = normalize(search_name)
+    _sync_index(folder_id)
 
     try:
-        results = drive_service.files().list(
-            q=query,
-            spaces="drive",
-            fields="nextPageToken, files(id, name, mimeType)",
-            pageSize=page_size,
-        ).execute()
-        items = results.get("files", [])
+        if lyrics_index.is_synced(folder_id):
+            items = lyrics_index.search(folder_id, clean, limit=page_size)
+        elif lyrics_mirror.offline():
+            return {"error": _NO_LOCAL_COPY}
+        else:
+            items = _search_drive(get_service("drive", "v3"), clean, folder_id, page_size)
         if not items:
             return None
 
-        # Attach snippet/content for each item if possible (read small snippets only)
-        out = []
+        if not include_content:
+            return [{"id": item["id"], "name": item.get("name"), "mimeType": item.get("mimeType")} for item in items]
+
+        contents = fetch_contents(items, folder_id)
+        return [
+            {"id": item["id"], "name": item.get("name"), "mimeType": item.get("mimeType"), "content": content}
+            for item, content in zip(items, contents)
+        ]
+    except (HttpError, *_CONNECTION_ERRORS) as e:
+        return _drive_error(e, "during search")
+
+
+@tracing.traced
+def find_files_by_names(
+    search_names: List[str],
+    folder_id: str = '1hiSf6DSAO2RIv7ZCT7ltU8uBYQFvaOQu',
+    include_content: bool = False,
+):
+    """
+    Find the files for a whole list of song titles (both languages, every song of the set) in
+    one call. Each title matches the files whose name contains it.
+    Returns {title: [{'id','name','mimeType'(,'content')}...]} (an empty list when nothing
+    matches), or {'error': ...} when Drive could not be searched.
+    Served from the local lyrics index; before the index has synced once, the titles are
+    sent to Drive as a few combined queries and every page of results is read.
+    """
+    cleans = {name: normalize(name) for name in search_names}
+    _sync_index(folder_id)
+
+    try:
+        if lyrics_index.is_synced(folder_id):
+            found = {c: lyrics_index.search(folder_id, c, limit=1000) for c in set(cleans.values()) if c}
+        elif lyrics_mirror.offline():
+            return {"error": _NO_LOCAL_COPY}
+        else:
+            found = _search_drive_many(get_service("drive", "v3"), list(cleans.values()), folder_id)
+
+        results = {name: found.get(clean, []) for name, clean in cleans.items()}
+        contents = {}
+        if include_content:
+            unique = list({item["id"]: item for items in results.values() for item in items}.values())
+            contents = dict(zip((item["id"] for item in unique), fetch_contents(unique, folder_id)))
+    except (HttpError, *_CONNECTION_ERRORS) as e:
+        return _drive_error(e, "during search")
+
+    out = {}
+    for name, items in results.items():
+        out[name] = []
         for item in items:
-            file_id = item["id"]
-            mime = item.get("mimeType")
-            # Read the file content (full) if it's reasonable; caller can choose
-            content = None
-            try:
-                content = read_drive_file(drive_service, file_id, mime)
-            except Exception as e:
-                logging.warning(f"Could not read content for {file_id}: {e}")
-            out.append({"id": file_id, "name": item.get("name"), "mimeType": mime, "content": content})
-        return out
-    except HttpError as e:
-        logging.error(f"Drive API error during search: {e}")
+            entry = {"id": item["id"], "name": item.get("name"), "mimeType": item.get("mimeType")}
+            if include_content:
+                entry["content"] = contents.get(item["id"])
+            out[name].append(entry)
+    return out
+
+
+@tracing.traced
+def match_song_titles(
+    titles: List[str], folder_id: str = '1hiSf6DSAO2RIv7ZCT7ltU8uBYQFvaOQu', limit: int = 5
+):
+    """
+    Fuzzy-match a whole list of song titles (e.g. every YouTube playlist title) against the
+    lyrics folder in one call. Tolerates spacing differences, YouTube noise such as
+    "[Official MV]" or "| channel name", romanized titles and small typos.
+    Returns {title: [{'id','name','score'}...]} ranked best first (score 1.0 = exact match);
+    an empty list means nothing in the folder resembles the title.
+    """
+    _sync_index(folder_id)
+
+    if not lyrics_index.is_synced(folder_id):
+        logging.error("Lyrics index is empty and Drive is unreachable; cannot match titles")
         return None
 
+    # the index only changes when a sync moves the token (or a new doc is written through, which drops it)
+    token = lyrics_index.changes_token(folder_id)
+    cached = _matchers.get(folder_id)
+    if cached is None or cached[0] != token:
+        cached = _matchers[folder_id] = (token, TitleMatcher(lyrics_index.list_files(folder_id)))
+    return cached[1].match(titles, limit=limit)
+
+
+@tracing.traced
+def read_lyrics_files(file_ids: List[str], folder_id: str = '1hiSf6DSAO2RIv7ZCT7ltU8uBYQFvaOQu'):
+    """
+    Load the content of lyric files by Drive file id (e.g. ids returned by
+    find_files_by_name with include_content=False). Files are downloaded in parallel.
+    Returns list of file dicts: [{'id','name','mimeType','content'}...], or {'error': ...}
+    when Drive could not be reached for a file the local index does not know.
+    """
+    lyrics_mirror.seed_index(folder_id)
+    items = []
+    try:
+        for file_id in file_ids:
+            item = lyrics_index.get_file(file_id)
+            if item is None and lyrics_mirror.offline():
+                return {"error": f"{file_id} is not in the local lyrics index and Google Drive is unreachable "
+                                 "(lyrics may exist, try again later)"}
+            if item is None:
+                item = execute(get_service("drive", "v3").files().get(
+                    fileId=file_id, fields="id, name, mimeType, modifiedTime"))
+            items.append(item)
+    except (HttpError, *_CONNECTION_ERRORS) as e:
+        return _drive_error(e, "while reading files")
+
+    contents = fetch_contents(items, folder_id)
+    return [
+        {"id": item["id"], "name": item.get("name"), "mimeType": item.get("mimeType"), "content": content}
+        for item, content in zip(items, contents)
+    ]
+
+
+@tracing.traced
+def align_song_lyrics(english_lyrics: str, korean_lyrics: str = "", title: str = ""):
+    """
+    Pair one song's English and Korean lyrics line by line and split them into slide chunks of
+    at most two lines, following the section markers (verse, chorus, bridge, 후렴, ...). Sections
+    whose line counts differ between the languages are paired by the model.
+    Pass the content of a lyric file that holds both languages as english_lyrics and leave
+    korean_lyrics empty to have the languages separated automatically.
+    The pairs are stored, not returned: returns {'handle', 'slides', 'first_slide',
+    'unresolved_sections'} or {'error': ...}. Pass the handles of all songs to compile_lyrics.
+    'unresolved_sections' counts sections the model could not pair; their lines were padded.
+    """
+    song = song_pairs(english_lyrics, korean_lyrics)
+    if not song["pairs"]:
+        return {"error": "No lyrics to align"}
+    return {
+        "handle": lyric_store.put(song["pairs"], title or None),
+        "slides": len(song["pairs"]),
+        "first_slide": song["pairs"][0],
+        "unresolved_sections": song["unresolved_sections"],
+    }
+
+
+@tracing.traced
+def store_lyric_pairs(pairs: List[Dict[str, str]], title: str = ""):
+    """
+    Store one song's {"english", "korean"} pairs that you aligned or corrected yourself.
+    Returns {'handle', 'slides'} to pass to compile_lyrics like the handles of align_song_lyrics.
+    """
+    pairs = [{"english": p.get("english", ""), "korean": p.get("korean", "")} for p in pairs]
+    return {"handle": lyric_store.put(pairs, title or None), "slides": len(pairs)}
+
+
+@tracing.traced
+def get_lyric_pairs(handle: str):
+    """
+    Return {'handle', 'title', 'pairs'} stored under a handle, e.g. to check or correct a song;
+    or {'error': ...} for an unknown handle.
+    """
+    entry = lyric_store.get(handle)
+    if entry is None:
+        return {"error": f"Unknown lyrics handle {handle!r}"}
+    return entry
+
+
+@tracing.traced
+def compile_lyrics(handles: List[str]):
+    """
+    Join the songs' handles, in set order, into one handle for the whole presentation.
+    Returns {'handle', 'songs', 'slides'} or {'error': ...}. Pass only this handle on to the slides.
+    """
+    pairs = []
+    for handle in handles:
+        entry = lyric_store.get(handle)
+        if entry is None:
+            return {"error": f"Unknown lyrics handle {handle!r}"}
+        # the song key keeps slide ids stable when the set changes (see lyric_slide_ids)
+        song = entry["title"] or entry["handle"]
+        pairs.extend({**pair, "song": pair.get("song") or song} for pair in entry["pairs"])
+    return {"handle": lyric_store.put(pairs), "songs": len(handles), "slides": len(pairs)}
+
+
+@tracing.traced
+def translate_lyrics(lyrics: str, target_language: str):
+    """
+    Translate one song's lyrics into target_language ('english' or 'korean'), one output line
+    per input line, keeping section markers. Translations are cached on disk, so a song that
+    was translated in an earlier week comes back instantly without a model call.
+    Returns {'lyrics': translated text} or {'error': ...}.
+    """
+    target = target_language.strip().lower()
+    if target not in ("english", "korean"):
+        return {"error": "target_language must be 'english' or 'korean'"}
+    try:
+        return {"lyrics": translate(lyrics, target)}
+    except Exception as e:
+        logging.error(f"Translation failed: {e}")
+        return {"error": f"Translation failed: {e}"}
+
+
+def _lyrics_doc(entry: Dict[str, str]) -> Tuple[str, str]:
+    """
+    Build the (doc name, doc text) of one song for drive_save_lyrics.
+    """
+    eng_title = entry.get("english_title") or entry.get("english") or ""
+    kor_title = entry.get("korean_title") or entry.get("korean") or ""
+    eng_lyrics = entry.get("english_lyrics") or entry.get("english_lyrics") or entry.get("english") or ""
+    kor_lyrics = entry.get("korean_lyrics") or entry.get("korean_lyrics") or entry.get("korean") or ""
+
+    name_parts = []
+    if kor_title.strip():
+        name_parts.append(kor_title.strip())
+    if eng_title.strip():
+        name_parts.append(eng_title.strip())
+
+    doc_name = " / ".join(name_parts) if name_parts else f"lyrics-{uuid.uuid4().hex[:8]}"
+
+    # Prepare content: english then korean (slide-by-slide style requested)
+    # We'll create a single ordered list: English Title -> English Lyrics -> Korean Title -> Korean Lyrics
+    parts = []
+    if eng_title:
+        parts.append(f"English Title: {eng_title}")
+    if eng_lyrics:
+        parts.extend([line for line in eng_lyrics.splitlines()])
+    if kor_title:
+        parts.append("")  # blank line separator
+        parts.append(f"Korean Title: {kor_title}")
+    if kor_lyrics:
+        parts.extend([line for line in kor_lyrics.splitlines()])
+
+    return doc_name, "\n".join(parts)
+
+
+def _upload_lyrics_doc(doc_name: str, text: str, folder_id: str) -> Dict:
+    file_metadata = {
+        "name": doc_name,
+        "mimeType": "application/vnd.google-apps.document",
+    }
+    if folder_id:
+        file_metadata["parents"] = [folder_id]
 
+    # one multipart upload: Drive converts the plain text into a Google Doc on the way in
+    media = MediaIoBaseUpload(io.BytesIO(text.encode("utf-8")), mimetype="text/plain", resumable=False)
+    new_file = execute(get_service("drive", "v3").files().create(
+        body=file_metadata, media_body=media, fields="id,name,mimeType,modifiedTime"
+    ))
+
+    # write through to the lyrics index
+    lyrics_index.store_file(folder_id, new_file, text)
+    _matchers.pop(folder_id, None)
+    return {"id": new_file.get("id"), "name": new_file.get("name")}
+
+
+@tracing.traced
 def drive_save_lyrics(lyrics_list: List[Dict[str, str]], folder_id: str = '1hiSf6DSAO2RIv7ZCT7ltU8uBYQFvaOQu'):
     """
     Save each song's lyrics as a separate Google Doc in the given Drive folder.
@@ -226,86 +643,37 @@ def drive_save_lyrics(lyrics_list: List[Dict[str, str]], folder_id: str = '1hiSf
         - 'english_title' or 'english'
         - 'korean_lyrics' or 'korean'
         - 'english_lyrics' or 'english'
-    Returns list of created file metadata [{'id', 'name'}]
+    Each song is a single upload and songs are saved in parallel.
+    Returns {'created': [{'id', 'name'}...], 'failed': [{'name', 'error'}...]}
     """
-    creds = get_credentials()
-    drive_service = build("drive", "v3", credentials=creds)
-    docs_service = build("docs", "v1", credentials=creds)
+    docs = [_lyrics_doc(entry) for entry in lyrics_list]
+    futures = [_get_pool().submit(tracing.propagate(_upload_lyrics_doc), name, text, folder_id) for name, text in docs]
 
     created_files = []
-
-    for entry in lyrics_list:
-        eng_title = entry.get("english_title") or entry.get("english") or ""
-        kor_title = entry.get("korean_title") or entry.get("korean") or ""
-        eng_lyrics = entry.get("english_lyrics") or entry.get("english_lyrics") or entry.get("english") or ""
-        kor_lyrics = entry.get("korean_lyrics") or entry.get("korean_lyrics") or entry.get("korean") or ""
-
-        name_parts = []
-        if kor_title.strip():
-            name_parts.append(kor_title.strip())
-        if eng_title.strip():
-            name_parts.append(eng_title.strip())
-
-        doc_name = " / ".join(name_parts) if name_parts else f"lyrics-{uuid.uuid4().hex[:8]}"
-
+    failed = []
+    for (doc_name, _), future in zip(docs, futures):
         try:
-            file_metadata = {
-                "name": doc_name,
-                "mimeType": "application/vnd.google-apps.document",
-            }
-            if folder_id:
-                file_metadata["parents"] = [folder_id]
-
-            new_file = drive_service.files().create(body=file_metadata, fields="id,name").execute()
-            doc_id = new_file.get("id")
-
-            # Prepare content: english then korean (slide-by-slide style requested)
-            # We'll create a single ordered list: English Title -> English Lyrics -> Korean Title -> Korean Lyrics
-            # Break into lines and ensure we insert line-by-line to preserve structure
-            parts = []
-            if eng_title:
-                parts.append(f"English Title: {eng_title}")
-            if eng_lyrics:
-                parts.extend([line for line in eng_lyrics.splitlines()])
-            if kor_title:
-                parts.append("")  # blank line separator
-                parts.append(f"Korean Title: {kor_title}")
-            if kor_lyrics:
-                parts.extend([line for line in kor_lyrics.splitlines()])
-
-            # Build batchUpdate requests: insert each line at increasing index
-            requests = []
-            # Insert at index 1 (start of doc). We'll insert a newline after each line so spacing is preserved.
-            cursor_index = 1
-            for idx, line in enumerate(parts):
-                # ensure each inserted chunk ends with newline (except maybe last — Docs handles final newline fine)
-                text_to_insert = f"{line}\n"
-                requests.append({"insertText": {"location": {"index": cursor_index}, "text": text_to_insert}})
-                cursor_index += len(text_to_insert)
-
-            if requests:
-                docs_service.documents().batchUpdate(documentId=doc_id, body={"requests": requests}).execute()
-
-            created_files.append({"id": doc_id, "name": new_file.get("name")})
+            created_files.append(future.result())
         except Exception as e:
             logging.error(f"Failed to create doc for '{doc_name}': {e}")
+            failed.append({"name": doc_name, "error": str(e)})
 
-    return created_files
+    return {"created": created_files, "failed": failed}
 
 
-lyric_retriever_agent = Agent(
-	model='gemini-2.5-pro',
-	name='LyricRetrieverAgent',
-	description='An agent specialized in retrieving English and Korean lyrics based on provided worship song titles',
-	instruction="""
+LYRIC_RETRIEVER_INSTRUCTION = """
 		You are the Lyric Retriever Agent. Your task is to fetch the lyrics for a list of songs provided by the user. 
 		
 		Follow these steps:
         1. You will be given a URL link to a YouTube playlist containing worship songs.
         2. Use the 'preview_youtube_playlist' tool to extract video titles from the playlist. Get the playlist ID from the URL.
 		
-		3. Based on the youtube song titles and the song titles provided by the user, attempt to search for an existing lyrics file in the Google Drive lyrics folder in both langauges (do two separate searches for English and Korean):
-			- Use the find_files_by_name() function to search for files matching the song title
+		3. Based on the youtube song titles and the song titles provided by the user, search the Google Drive lyrics folder for existing lyrics files in both languages:
+            - First call match_song_titles() once with ALL the titles; it returns ranked candidates with scores for every title. A top score close to 1.0 is a confident match - load it with read_lyrics_files().
+			- For titles without a confident match, call find_files_by_names() ONCE with all of them, listing both the English and the Korean title of each song. Do not search title by title or language by language.
+			- Use find_files_by_name() only for a single follow-up search (e.g. a title the user corrects)
+            - When you only need the candidate names (e.g. to ask the user which file to use), call find_files_by_name() with include_content=False and then load the chosen files with read_lyrics_files()
+            - If find_files_by_name() returns an 'error', Google Drive could not be searched - that does NOT mean the lyrics are missing. Tell the user and try again instead of asking for the lyrics.
             - Remove any numbers or special characters from the song title to improve matching
 			- If a file is found, read and use those lyrics. You may have to clean up random letters and numbers from the text.
 			- If multiple files match, list them to the user and ask which one to select
@@ -313,40 +681,64 @@ lyric_retriever_agent = Agent(
 		
 		4. If a song's lyrics can't be found in the Google Drive, then request the user to send the lyrics for both English and Korean versions.
 		
-		5. If the user can only send lyrics in one language, translate the missing version yourself ensuring accuracy and maintaining the original meaning.
-			Be faithful to the structure of the song. 
+		5. If the user can only send lyrics in one language, translate the missing version with the translate_lyrics() tool (it keeps the line structure and reuses earlier translations of the same song).
+			Only if it returns an 'error', translate it yourself ensuring accuracy and maintaining the original meaning. Be faithful to the structure of the song. 
 		
 		6. Match the English and Korean lyrics line by line, ensuring that each line corresponds correctly between the two languages.
-            Ensure you are adhering to the song structure (verses, choruses, bridges, etc.) when matching lines. If necessary, make minor adjustments in terms of newlines to maintain alignment.
+            Call the align_song_lyrics() tool once per song with its title - it pairs the lines, produces the two-line chunks and
+            stores them, returning a short handle (e.g. "lyr_1a2b3c4d5e6f") instead of the lyrics.
+            Use 'first_slide' to check that the languages line up. If a song needs corrections (or 'unresolved_sections' is not 0),
+            load it with get_lyric_pairs(handle), fix the pairs and store them again with store_lyric_pairs(pairs, title), which returns the new handle.
+            Ensure you are adhering to the song structure (verses, choruses, bridges, etc.) when matching lines.
 		
-		7. Compile the list into a JSON string containing english and korean lyric pairs for all the songs. Each line should match as the song goes. 
-			Each value for each key in the dictionary should be maximum two lines long, separated by a newline character (\n).
-            It is imperative that each line in English matches the corresponding line in Korean.
-			Important: Return ONLY a valid JSON string (no explanatory text). The JSON must be a list of objects:
-			[
-				{"english": "line1\nline2", "korean": "라인1\n라인2"},
-				{"english": "line3\nline4", "korean": "라인3\n라인4"},
-			...
-			]
-			
-			Example english and korean lyric pair:
-			[
-				{"english": "Amazing grace, how sweet the sound\nThat saved a wretch like me", "korean": "나 같은 죄인 살리신\n주 은혜 놀라워"},
-			]
+		7. Call compile_lyrics() with the handles of all the songs, in the order of the playlist. It returns one handle for the whole set.
+			Do NOT write out the lyrics as JSON yourself.
 		
-		8. Return the compiled lyrics and print them.
+		8. Return the compiled handle together with the number of songs and slides, for example:
+			Lyrics handle: lyr_1a2b3c4d5e6f (5 songs, 64 slides)
 
         9. For any songs given by the user, save the lyrics files to Google Drive using the 'drive_save_lyrics' tool. 
             The lyrics should be saved 'slide-by-slide' meaning it should be english then korean, then next english then next korean, etc.
+            Save all the songs in a single drive_save_lyrics call. If any come back under 'failed', tell the user which ones.
 		
 		PRIORITY: Always check Google Drive files first before asking the user for lyrics.
-	""",
-	generate_content_config = GenerateContentConfig(
-		temperature=0.01,
-	),
+	"""
+
+
+def _build_agent():
+    from google.adk.agents import Agent
+    from google.genai.types import GenerateContentConfig
+
+    return Agent(
+        model='gemini-2.5-pro',
+        name='LyricRetrieverAgent',
+        description='An agent specialized in retrieving English and Korean lyrics based on provided worship song titles',
+        instruction=LYRIC_RETRIEVER_INSTRUCTION,
+        generate_content_config = GenerateContentConfig(
+            temperature=0.01,
+        ),
+        before_agent_callback=tracing.bind_invocation,
+        before_model_callback=tracing.before_model,
+        after_model_callback=tracing.after_model,
         tools=[
-        find_files_by_name,
-        preview_youtube_playlist,
-        drive_save_lyrics
-    ],
-)
\ No newline at end of file
+            match_song_titles,
+            find_files_by_name,
+            find_files_by_names,
+            read_lyrics_files,
+            align_song_lyrics,
+            store_lyric_pairs,
+            get_lyric_pairs,
+            compile_lyrics,
+            translate_lyrics,
+            preview_youtube_playlist,
+            drive_save_lyrics
+        ],
+    )
+
+
+def __getattr__(name):
+    # built on first access: the pipeline and lyrics_mirror only need the Drive lookups
+    if name == "lyric_retriever_agent":
+        agent = globals()[name] = _build_agent()
+        return agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
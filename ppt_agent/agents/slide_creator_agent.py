@@ -1,46 +1,31 @@
 from __future__ import print_function
 import os.path
+import bisect
 import datetime
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+import hashlib
+import io
 from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaIoBaseUpload
 import uuid
-from google.adk.agents import Agent
 import json
+from ..google_clients import execute, get_service
+from typing import Optional
+from .. import build_journal, lyric_store, tracing
 
 # --- CONFIG ---
-SCOPES = ['https://www.googleapis.com/auth/drive']  # or 'https://www.googleapis.com/auth/drive'
 TARGET_FOLDER_ID = '1PoqUg00k3BA1HOG1Nn4HyqpUhvdUT-YX'  # optional
 TEMPLATE_SUNDAY_PRESENTATION_ID = '1FCivH5ECj72APlWDdsu_3BoHZN9LWbBl'
 TEMPLATE_FRIDAY_PRESENTATION_ID = '1LevZxXZWhVzD06DYpSTbddw9-t0RlU4M'
+SLIDES_PER_BATCH = 50  # lyric slides per batchUpdate (12 requests each) to keep payloads small
+TEMPLATE_CACHE_DIR = "./ppt_agent/templates"  # exported .pptx copies of the templates (offline engine)
+RESUMABLE_UPLOAD_BYTES = 5 * 1024 * 1024  # smaller decks go up in a single multipart request
 
 
+@tracing.traced
 def create_slides_file(TEMPLATE_ID = '1FCivH5ECj72APlWDdsu_3BoHZN9LWbBl'):
-    """Creates a new Google Slides presentation using OAuth credentials."""
-    creds = None
-
-    # Token is stored after first successful login
-    if os.path.exists('token.json'):
-        creds = Credentials.from_authorized_user_file('token.json', SCOPES)
-
-    # If no valid credentials, log in through browser
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file(
-                './ppt_agent/credentials.json', SCOPES)
-            creds = flow.run_local_server(port=0)
-        # Save the credentials for next time
-        with open('./ppt_agent/token.json', 'w') as token:
-            token.write(creds.to_json())
-
+    """Creates a new Google Slides presentation by copying the template."""
     try:
-        # Build Drive and Slides clients
-        drive_service = build('drive', 'v3', credentials=creds)
-        
+        drive_service = get_service('drive', 'v3')
 
         # Generate a unique presentation name
         timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
@@ -55,10 +40,10 @@ def create_slides_file(TEMPLATE_ID = '1FCivH5ECj72APlWDdsu_3BoHZN9LWbBl'):
             file_metadata['parents'] = [TARGET_FOLDER_ID]
 
         # Copy template presentation
-        file = drive_service.files().copy(
+        file = execute(drive_service.files().copy(
             fileId=TEMPLATE_ID,
             body=file_metadata
-        ).execute()
+        ))
 
 
         #file = drive_service.files().create(body=file_metadata, fields='id').execute()
@@ -71,191 +56,686 @@ def create_slides_file(TEMPLATE_ID = '1FCivH5ECj72APlWDdsu_3BoHZN9LWbBl'):
         print(f"❌ An API error occurred: {error}")
 
 
-def add_lyric_slide(presentation_id, english, korean, insertion_index=5):
+LYRIC_ID_PREFIX = "ly_"  # every lyric slide id starts with this; other slides belong to the template
+
+# text styles of the two boxes on a lyric slide
+ENGLISH_TEXT_STYLE = {
+    "fontFamily": "Arial Black",
+    "fontSize": {"magnitude": 26, "unit": "PT"},
+    "foregroundColor": {"opaqueColor": {"rgbColor": {"red": 1.0, "green": 1.0, "blue": 0.0}}},
+}
+KOREAN_TEXT_STYLE = {
+    "fontFamily": "Calibri",
+    "fontSize": {"magnitude": 30, "unit": "PT"},
+    "foregroundColor": {"opaqueColor": {"rgbColor": {"red": 1.0, "green": 1.0, "blue": 1.0}}},
+    "bold": True,
+}
+
+LAYOUT_FIELDS = (
+    "pageSize,masters(objectId),"
+    "layouts(objectId,layoutProperties(name,masterObjectId),pageElements(objectId,shape(placeholder)))"
+)
+
+
+def read_deck(slides_service, presentation_id, with_text=False):
     """
-    Create a new slide, remove default placeholders, then add two text boxes:
-    - English (top) — yellow, Arial Black, 24pt, centered
-    - Korean  (below) — white, Arial, 24pt, centered
+    One presentations.get with the page size, layouts and slide order (and, with_text, the text of
+    every shape) - everything the builders below need.
     """
-    if os.path.exists('./ppt_agent/token.json'):
-        creds = Credentials.from_authorized_user_file('./ppt_agent/token.json', SCOPES)
-    else:
-        raise RuntimeError("token.json not found; run OAuth flow first")
+    elements = ",pageElements(objectId,shape(text(textElements(textRun(content)))))" if with_text else ""
+    return execute(slides_service.presentations().get(
+        presentationId=presentation_id,
+        fields=f"{LAYOUT_FIELDS},slides(objectId,slideProperties(masterObjectId){elements})"
+    ))
 
-    slides_service = build('slides', 'v1', credentials=creds)
 
-    try:
-        pres = slides_service.presentations().get(presentationId=presentation_id).execute()
-        page_width_pt = pres['pageSize']['width']['magnitude'] / 12700.0
-        page_height_pt = pres['pageSize']['height']['magnitude'] / 12700.0
+def _current_master(pres, insertion_index):
+    # the master createSlide works from: the previous slide's, the first slide's when inserting
+    # at the front, the first master's in a deck without slides
+    slides = pres.get("slides", [])
+    if slides:
+        slide = slides[min(max(insertion_index - 1, 0), len(slides) - 1)]
+        return slide.get("slideProperties", {}).get("masterObjectId")
+    return next((master.get("objectId") for master in pres.get("masters", [])), None)
 
-        full_width = {"magnitude": page_width_pt, "unit": "PT"}
-        eng_height = 90
-        korean_height = 90
-        
-        eng_pt = {"magnitude": eng_height, "unit": "PT"}
-        kor_pt = {"magnitude": korean_height, "unit": "PT"}
 
-        slide_id = f"slide_{uuid.uuid4().hex[:8]}"
-        
-        eng_id = f"eng_{uuid.uuid4().hex[:8]}"
-        kor_id = f"kor_{uuid.uuid4().hex[:8]}"
-
-        # Y positions (translateY) measured in PT from top
-        eng_translate_y = page_height_pt - 180
-        kor_translate_y = page_height_pt - 90
-
-        requests = [
-            # create slide
-            {
-                "createSlide": {
-                    "objectId": slide_id,
-                    "insertionIndex": str(insertion_index),
-                    #"slideLayoutReference": {"predefinedLayout": layout}
-                }
-            },
-            # set background to black
-            {
-                "updatePageProperties": {
-                    "objectId": slide_id,
-                    "pageProperties": {
-                        "pageBackgroundFill": {
-                            "solidFill": {
-                                "color": {
-                                    "rgbColor": {"red": 0.0, "green": 0.0, "blue": 0.0}
-                                }
+def deck_geometry(pres, insertion_index=0):
+    """
+    Page size and a placeholder-free layout of a presentation resource.
+    createSlide only accepts layouts of the master in use at insertion_index, so in a template
+    with several masters only that master's layouts are considered.
+    Returns {'page_width_pt', 'page_height_pt', 'layout_id'}; layout_id is None
+    when every such layout carries placeholders (createSlide then uses its BLANK default).
+    """
+    master = _current_master(pres, insertion_index)
+    layout_id = None
+    for layout in pres.get("layouts", []):
+        if master and layout.get("layoutProperties", {}).get("masterObjectId", master) != master:
+            continue
+        placeholders = [
+            pe for pe in layout.get("pageElements", [])
+            if pe.get("shape", {}).get("placeholder")
+        ]
+        if not placeholders:
+            layout_id = layout.get("objectId")
+            # prefer the real BLANK layout when the template has one
+            if layout.get("layoutProperties", {}).get("name") == "BLANK":
+                break
+
+    return {
+        "page_width_pt": pres['pageSize']['width']['magnitude'] / 12700.0,
+        "page_height_pt": pres['pageSize']['height']['magnitude'] / 12700.0,
+        "layout_id": layout_id,
+    }
+
+
+def lyric_slide_ids(text_pairs, chunks=None):
+    """
+    Stable slide ids for a list of lyric pairs: 'ly_' + a hash of the pair's song and its chunk
+    number within that song. Pairs may carry a 'song' key (e.g. the playlist title); without it
+    the whole set counts as one song and the ids follow the slide position.
+    The same song and chunk always get the same id, which is what update_presentation diffs on.
+    Pass the same chunks dict to number a set handed over in several parts.
+    """
+    chunks = {} if chunks is None else chunks
+    ids = []
+    for pair in text_pairs:
+        song = pair.get("song", "")
+        chunk = chunks[song] = chunks.get(song, -1) + 1
+        digest = hashlib.sha1(f"{song}\x1f{chunk}".encode("utf-8")).hexdigest()[:16]
+        ids.append(f"{LYRIC_ID_PREFIX}{digest}")
+    return ids
+
+
+def text_requests(box_id, text, style):
+    """
+    Insert text into a lyric text box, then style and center it.
+    """
+    if not text:
+        return []
+    return [
+        {"insertText": {"objectId": box_id, "text": text}},
+        {
+            "updateTextStyle": {
+                "objectId": box_id,
+                "style": style,
+                "fields": ",".join(style),
+            }
+        },
+        {"updateParagraphStyle": {"objectId": box_id, "style": {"alignment": "CENTER"}, "fields": "alignment"}},
+    ]
+
+
+def lyric_slide_requests(slide_id, english, korean, insertion_index, geometry):
+    """
+    Build the batchUpdate requests for one lyric slide:
+    - English (top) — yellow, Arial Black, 26pt, centered
+    - Korean  (below) — white, Calibri bold, 30pt, centered
+    Text box ids are derived from the slide id ('<slide_id>_eng', '<slide_id>_kor').
+    """
+    page_width_pt = geometry["page_width_pt"]
+    page_height_pt = geometry["page_height_pt"]
+
+    full_width = {"magnitude": page_width_pt, "unit": "PT"}
+    eng_height = 90
+    korean_height = 90
+
+    eng_pt = {"magnitude": eng_height, "unit": "PT"}
+    kor_pt = {"magnitude": korean_height, "unit": "PT"}
+
+    eng_id = f"{slide_id}_eng"
+    kor_id = f"{slide_id}_kor"
+
+    # Y positions (translateY) measured in PT from top
+    eng_translate_y = page_height_pt - 180
+    kor_translate_y = page_height_pt - 90
+
+    create_slide = {
+        "objectId": slide_id,
+        "insertionIndex": str(insertion_index),
+    }
+    if geometry.get("layout_id"):
+        # a layout without placeholders means there is nothing to clean up afterwards
+        create_slide["slideLayoutReference"] = {"layoutId": geometry["layout_id"]}
+
+    return [
+        # create slide
+        {"createSlide": create_slide},
+        # set background to black
+        {
+            "updatePageProperties": {
+                "objectId": slide_id,
+                "pageProperties": {
+                    "pageBackgroundFill": {
+                        "solidFill": {
+                            "color": {
+                                "rgbColor": {"red": 0.0, "green": 0.0, "blue": 0.0}
                             }
                         }
-                    },
-                    "fields": "pageBackgroundFill"
-                }
-            },
-            # create English text box (top)
-            {
-                "createShape": {
-                    "objectId": eng_id,
-                    "shapeType": "TEXT_BOX",
-                    "elementProperties": {
-                        "pageObjectId": slide_id,
-                        "size": {"height": eng_pt, "width": full_width},
-                        "transform": {
-                            "scaleX": 1,
-                            "scaleY": 1,
-                            "translateX": 0,
-                            "translateY": eng_translate_y,
-                            "unit": "PT"
-                        }
-                    },
-                }
-            },
-            {
-                "updateShapeProperties": {
-                    "objectId": eng_id,
-                    "shapeProperties": {
-                        "contentAlignment": "BOTTOM"   # options: TOP, MIDDLE, BOTTOM
-                    },
-                    "fields": "contentAlignment"
-                }
-            },
-            # create Korean text box (below)
-            {
-                "createShape": {
-                    "objectId": kor_id,
-                    "shapeType": "TEXT_BOX",
-                    "elementProperties": {
-                        "pageObjectId": slide_id,
-                        "size": {"height": kor_pt, "width": full_width},
-                        "transform": {
-                            "scaleX": 1,
-                            "scaleY": 1,
-                            "translateX": 0,
-                            "translateY": kor_translate_y,
-                            "unit": "PT"
-                        }
+                    }
+                },
+                "fields": "pageBackgroundFill"
+            }
+        },
+        # create English text box (top)
+        {
+            "createShape": {
+                "objectId": eng_id,
+                "shapeType": "TEXT_BOX",
+                "elementProperties": {
+                    "pageObjectId": slide_id,
+                    "size": {"height": eng_pt, "width": full_width},
+                    "transform": {
+                        "scaleX": 1,
+                        "scaleY": 1,
+                        "translateX": 0,
+                        "translateY": eng_translate_y,
+                        "unit": "PT"
+                    }
+                },
+            }
+        },
+        {
+            "updateShapeProperties": {
+                "objectId": eng_id,
+                "shapeProperties": {
+                    "contentAlignment": "BOTTOM"   # options: TOP, MIDDLE, BOTTOM
+                },
+                "fields": "contentAlignment"
+            }
+        },
+        # create Korean text box (below)
+        {
+            "createShape": {
+                "objectId": kor_id,
+                "shapeType": "TEXT_BOX",
+                "elementProperties": {
+                    "pageObjectId": slide_id,
+                    "size": {"height": kor_pt, "width": full_width},
+                    "transform": {
+                        "scaleX": 1,
+                        "scaleY": 1,
+                        "translateX": 0,
+                        "translateY": kor_translate_y,
+                        "unit": "PT"
                     }
                 }
+            }
+        },
+        {
+            "updateShapeProperties": {
+                "objectId": kor_id,
+                "shapeProperties": {
+                    "contentAlignment": "TOP"   # options: TOP, MIDDLE, BOTTOM
+                },
+                "fields": "contentAlignment"
+            }
+        },
+        # english text: Arial Black, 26pt, yellow, centered
+        *text_requests(eng_id, english, ENGLISH_TEXT_STYLE),
+        # korean text: Calibri bold, 30pt, white, centered
+        *text_requests(kor_id, korean, KOREAN_TEXT_STYLE),
+    ]
+
+
+def move_slide_request(order, slide_id, target):
+    """
+    updateSlidesPosition that puts slide_id in front of the slide now at index `target` of `order`
+    (the current slide order, which still contains slide_id), or None if it is already there.
+    Applies the move to `order`. Like the API, `target` counts the slide being moved.
+    """
+    current = order.index(slide_id)
+    if current in (target, target - 1):
+        return None
+    order.remove(slide_id)
+    order.insert(target - 1 if current < target else target, slide_id)
+    return {"updateSlidesPosition": {"slideObjectIds": [slide_id], "insertionIndex": target}}
+
+
+def content_key(pair):
+    """
+    Content address of a lyric slide: identical English and Korean text means an identical slide.
+    """
+    return hashlib.sha1(f"{pair['english']}\x1f{pair['korean']}".encode("utf-8")).hexdigest()
+
+
+def place_lyric_slide(order, slide_id, pair, index, geometry, by_content):
+    """
+    Requests that put the lyric slide for pair at position `index` of the deck.
+    When by_content (content_key -> slide id) already has an identical slide - a repeated chorus,
+    say - it is copied with duplicateObject (the copy lands right after its source) and moved
+    into place: two small requests instead of the full shape and style payload.
+    Updates order and by_content.
+    """
+    source = by_content.get(content_key(pair))
+    if source is None:
+        order.insert(index, slide_id)
+        by_content[content_key(pair)] = slide_id
+        return lyric_slide_requests(slide_id, pair['english'], pair['korean'], index, geometry)
+
+    requests = [{
+        "duplicateObject": {
+            "objectId": source,
+            "objectIds": {
+                source: slide_id,
+                f"{source}_eng": f"{slide_id}_eng",
+                f"{source}_kor": f"{slide_id}_kor",
             },
-            {
-                "updateShapeProperties": {
-                    "objectId": kor_id,
-                    "shapeProperties": {
-                        "contentAlignment": "TOP"   # options: TOP, MIDDLE, BOTTOM
-                    },
-                    "fields": "contentAlignment"
-                }
-            },
-            # insert english text
-            {"insertText": {"objectId": eng_id, "text": english}},
-            # style english (Arial Black, 24pt, yellow)
-            {
-                "updateTextStyle": {
-                    "objectId": eng_id,
-                    "style": {
-                        "fontFamily": "Arial Black",
-                        "fontSize": {"magnitude": 26, "unit": "PT"},
-                        "foregroundColor": {"opaqueColor": {"rgbColor": {"red": 1.0, "green": 1.0, "blue": 0.0}}}
-                    },
-                    "fields": "fontFamily,fontSize,foregroundColor"
-                }
-            },
-            # center english paragraph
-            {"updateParagraphStyle": {"objectId": eng_id, "style": {"alignment": "CENTER"}, "fields": "alignment"}},
-
-            # insert korean text
-            {"insertText": {"objectId": kor_id, "text": korean}},
-            # style korean (Arial, 24pt, white)
-            {
-                "updateTextStyle": {
-                    "objectId": kor_id,
-                    "style": {
-                        "fontFamily": "Calibri",
-                        "fontSize": {"magnitude": 30, "unit": "PT"},
-                        "foregroundColor": {"opaqueColor": {"rgbColor": {"red": 1.0, "green": 1.0, "blue": 1.0}}},
-                        "bold": True
-                    },
-                    "fields": "fontFamily,fontSize,foregroundColor, bold"
-                }
-            },
-            # center korean paragraph
-            {"updateParagraphStyle": {"objectId": kor_id, "style": {"alignment": "CENTER"}, "fields": "alignment"}}
-        ]
+        }
+    }]
+    order.insert(order.index(source) + 1, slide_id)
+    # move_slide_request counts the moving slide in its target
+    move = move_slide_request(order, slide_id, index + 1 if order.index(slide_id) < index else index)
+    if move:
+        requests.append(move)
+    return requests
+
+
+def delete_leftover_placeholders(slides_service, presentation_id, slide_ids):
+    """
+    Delete any page elements on the given slides that we did not create ourselves.
+    Only needed when the deck has no placeholder-free layout; one read covers every slide.
+    """
+    wanted = set(slide_ids)
+    pres_after = execute(slides_service.presentations().get(
+        presentationId=presentation_id,
+        fields="slides(objectId,pageElements(objectId))"
+    ))
+
+    delete_requests = []
+    for s in pres_after.get("slides", []):
+        slide_id = s.get("objectId")
+        if slide_id not in wanted:
+            continue
+        for pe in s.get("pageElements", []):
+            pid = pe.get("objectId")
+            # skip the two shapes we created
+            if pid and pid not in (f"{slide_id}_eng", f"{slide_id}_kor"):
+                delete_requests.append({"deleteObject": {"objectId": pid}})
+
+    if delete_requests:
+        execute(slides_service.presentations().batchUpdate(presentationId=presentation_id, body={"requests": delete_requests}))
+
+
+def add_lyric_slide(presentation_id, english, korean, insertion_index=5):
+    """
+    Create a single lyric slide. Kept for one-off additions; whole decks should go
+    through add_lyric_slides, which shares one geometry read and one batchUpdate.
+    """
+    # a song key of its own keeps the slide id clear of the ids of a whole deck
+    pair = {"english": english, "korean": korean, "song": f"one-off {uuid.uuid4().hex}"}
+    return add_lyric_slides(presentation_id, [pair], insertion_index)[0]
 
-        # remove any default pageElements after creating the slide (defensive)
-        slides_service.presentations().batchUpdate(presentationId=presentation_id, body={"requests": requests}).execute()
 
-        # fetch pageElements for the new slide and delete any leftover placeholders
-        pres_after = slides_service.presentations().get(
-            presentationId=presentation_id,
-            fields="slides(objectId,pageElements(objectId))"
-        ).execute()
+class LyricDeckWriter:
+    """
+    Appends lyric slides to a deck, part by part (e.g. one song at a time), in order from
+    insertion_index. The deck is read once; slide numbering (lyric_slide_ids) and the
+    content map of place_lyric_slide carry over from one append to the next.
+    Slides whose id is already in the deck were committed by an earlier, interrupted build of
+    the same pairs and are skipped, so rerunning a build resumes after its last batch.
+    on_commit(slides), when given, is called after each batchUpdate with the number of lyric
+    slides now in the deck.
+    """
+
+    def __init__(self, presentation_id, insertion_index=5, slides_per_batch=SLIDES_PER_BATCH, on_commit=None):
+        self.presentation_id = presentation_id
+        self.slides_per_batch = slides_per_batch
+        self.on_commit = on_commit
+        self.slides_service = get_service('slides', 'v1')
+        pres = read_deck(self.slides_service, presentation_id)
+        self.geometry = deck_geometry(pres, insertion_index)
+        self.order = [slide["objectId"] for slide in pres.get("slides", [])]
+        self.existing = {slide_id for slide_id in self.order if slide_id.startswith(LYRIC_ID_PREFIX)}
+        self.next_index = min(insertion_index, len(self.order))
+        self.chunks = {}
+        self.by_content = {}
+        self.committed = 0
 
-        delete_requests = []
-        for s in pres_after.get("slides", []):
-            if s.get("objectId") != slide_id:
+    def _send(self, requests, committed):
+        if requests:
+            execute(self.slides_service.presentations().batchUpdate(
+                presentationId=self.presentation_id, body={"requests": requests}
+            ))
+        self.committed = committed
+        if self.on_commit:
+            self.on_commit(committed)
+
+    def append(self, text_pairs):
+        """
+        Add the pairs after the slides written so far; returns their slide ids.
+        """
+        done = self.committed
+        slide_ids = []
+        created = []
+        requests = []
+        for slide_id, pair in zip(lyric_slide_ids(text_pairs, self.chunks), text_pairs):
+            slide_ids.append(slide_id)
+            if slide_id in self.existing:
+                self.by_content.setdefault(content_key(pair), slide_id)
+                self.next_index = self.order.index(slide_id) + 1
                 continue
-            for pe in s.get("pageElements", []):
-                pid = pe.get("objectId")
-                # skip the two shapes we just created
-                if pid and pid not in (eng_id, kor_id):
-                    delete_requests.append({"deleteObject": {"objectId": pid}})
+            created.append(slide_id)
+            requests.extend(place_lyric_slide(
+                self.order, slide_id, pair, self.next_index, self.geometry, self.by_content
+            ))
+            self.next_index += 1
+            if len(created) % self.slides_per_batch == 0:
+                self._send(requests, done + len(slide_ids))
+                requests = []
+
+        self._send(requests, done + len(slide_ids))
 
-        if delete_requests:
-            slides_service.presentations().batchUpdate(presentationId=presentation_id, body={"requests": delete_requests}).execute()
+        if created and not self.geometry["layout_id"]:
+            delete_leftover_placeholders(self.slides_service, self.presentation_id, created)
+        return slide_ids
 
-        print(f"✅ Added slide {slide_id} to {presentation_id}")
-        return slide_id
+
+@tracing.traced
+def add_lyric_slides(presentation_id, text_pairs, insertion_index=5, slides_per_batch=SLIDES_PER_BATCH):
+    """
+    Add every lyric pair as a slide, in order, starting at insertion_index.
+    The template geometry is read once and all slides, text boxes and styles are
+    sent in as few batchUpdate calls as possible (slides_per_batch slides per call).
+    Each distinct pair is built once; repeats are duplicates of the first copy (place_lyric_slide).
+    Slide ids come from lyric_slide_ids, so the deck can later be changed with update_presentation.
+    Returns the list of created slide ids.
+    """
+    try:
+        slide_ids = LyricDeckWriter(presentation_id, insertion_index, slides_per_batch).append(text_pairs)
+        print(f"✅ Added {len(slide_ids)} slides to {presentation_id}")
+        return slide_ids
 
     except HttpError as error:
         print(f"❌ An API error occurred: {error}")
         raise
 
-def create_presentation(text_pairs: list[dict[str, str]]) -> None:
-    presentation_id = create_slides_file()
-    
-    for pair in reversed(text_pairs):
-        add_lyric_slide(presentation_id, pair['english'], pair['korean'])
-    
-    print("Presentation created with URL: https://docs.google.com/presentation/d/{}/edit".format(presentation_id))
+def _slide_texts(slide):
+    """
+    {element id: text} for the shapes of a slide read with read_deck(with_text=True).
+    The API ends every paragraph with a newline; that last one is dropped.
+    """
+    texts = {}
+    for pe in slide.get("pageElements", []):
+        elements = pe.get("shape", {}).get("text", {}).get("textElements", [])
+        texts[pe["objectId"]] = "".join(te.get("textRun", {}).get("content", "") for te in elements).rstrip("\n")
+    return texts
+
+
+def _replace_text_requests(box_id, old_text, new_text, style):
+    requests = [{"deleteText": {"objectId": box_id, "textRange": {"type": "ALL"}}}] if old_text else []
+    return requests + text_requests(box_id, new_text, style)
+
+
+def _stable_subset(ids, position):
+    """
+    The ids (in the order wanted) that can stay where they are: the longest run of them that
+    is already in increasing deck position. Every other id needs one move.
+    """
+    tails, tail_ids, previous = [], [], {}
+    for slide_id in ids:
+        pos = position[slide_id]
+        i = bisect.bisect_left(tails, pos)
+        previous[slide_id] = tail_ids[i - 1] if i else None
+        if i == len(tails):
+            tails.append(pos)
+            tail_ids.append(slide_id)
+        else:
+            tails[i] = pos
+            tail_ids[i] = slide_id
+    stable, slide_id = set(), tail_ids[-1] if tail_ids else None
+    while slide_id is not None:
+        stable.add(slide_id)
+        slide_id = previous[slide_id]
+    return stable
+
+
+def _pairs_or_handle(text_pairs, lyrics_handle):
+    """
+    The lyric pairs a tool was given, directly or as a lyric_store handle.
+    """
+    if lyrics_handle:
+        return lyric_store.load(lyrics_handle)
+    if text_pairs is None:
+        raise ValueError("Pass the lyrics as text_pairs or as a lyrics_handle")
+    return text_pairs
+
+
+@tracing.traced
+def update_presentation(
+    presentation_id: str, text_pairs: Optional[list[dict[str, str]]] = None, insertion_index: int = 5,
+    lyrics_handle: str = "",
+) -> dict:
+    """
+    Bring the lyric slides of an existing deck in line with text_pairs (or the pairs stored under
+    lyrics_handle) without rebuilding it.
+    Slides are matched by their stable ids (lyric_slide_ids), and only the difference is sent:
+    deleted slides, replaced text, moved slides and new slides, in as few batchUpdate calls
+    as possible. A one-line correction costs one read and one small batchUpdate.
+    Decks made by the pptx engine carry no stable ids; their lyric slides are left alone.
+    Returns {'presentation_id', 'inserted', 'deleted', 'updated', 'moved'}.
+    """
+    text_pairs = _pairs_or_handle(text_pairs, lyrics_handle)
+    slides_service = get_service('slides', 'v1')
+    pres = read_deck(slides_service, presentation_id, with_text=True)
+    geometry = deck_geometry(pres, insertion_index)
+
+    order = [slide["objectId"] for slide in pres.get("slides", [])]
+    current = {
+        slide["objectId"]: _slide_texts(slide)
+        for slide in pres.get("slides", []) if slide["objectId"].startswith(LYRIC_ID_PREFIX)
+    }
+    wanted_ids = lyric_slide_ids(text_pairs)
+    wanted = dict(zip(wanted_ids, text_pairs))
+    requests = []
+    stats = {"inserted": 0, "deleted": 0, "updated": 0, "moved": 0}
+
+    # slides that are gone (or lost one of their text boxes and get rebuilt)
+    for slide_id, texts in current.items():
+        if slide_id not in wanted or f"{slide_id}_eng" not in texts or f"{slide_id}_kor" not in texts:
+            requests.append({"deleteObject": {"objectId": slide_id}})
+            order.remove(slide_id)
+            stats["deleted"] += 1
+
+    # changed text on slides that stay
+    kept = [slide_id for slide_id in wanted_ids if slide_id in order]
+    for slide_id in kept:
+        texts, pair = current[slide_id], wanted[slide_id]
+        changed = False
+        for box, key, style in (("_eng", "english", ENGLISH_TEXT_STYLE), ("_kor", "korean", KOREAN_TEXT_STYLE)):
+            old_text = texts[slide_id + box]
+            if old_text != pair[key].rstrip("\n"):
+                requests.extend(_replace_text_requests(slide_id + box, old_text, pair[key], style))
+                changed = True
+        stats["updated"] += changed
+
+    # reorder the slides that stay, moving as few as possible
+    if kept:
+        stable = _stable_subset(kept, {slide_id: i for i, slide_id in enumerate(order)})
+        block_start = min(order.index(slide_id) for slide_id in kept)
+        for i, slide_id in enumerate(kept):
+            if slide_id in stable:
+                continue
+            target = order.index(kept[i - 1]) + 1 if i else block_start
+            move = move_slide_request(order, slide_id, target)
+            if move:
+                requests.append(move)
+                stats["moved"] += 1
+
+    # new slides, each right after the slide that precedes it in text_pairs; repeats of a
+    # slide that is (or will be) in the deck are duplicated from it
+    by_content = {content_key(wanted[slide_id]): slide_id for slide_id in kept}
+    new_ids = []
+    for i, slide_id in enumerate(wanted_ids):
+        if slide_id in order:
+            continue
+        if i:
+            target = order.index(wanted_ids[i - 1]) + 1
+        else:
+            target = order.index(kept[0]) if kept else min(insertion_index, len(order))
+        requests.extend(place_lyric_slide(order, slide_id, wanted[slide_id], target, geometry, by_content))
+        new_ids.append(slide_id)
+    stats["inserted"] = len(new_ids)
+
+    max_requests = SLIDES_PER_BATCH * 12
+    for start in range(0, len(requests), max_requests):
+        execute(slides_service.presentations().batchUpdate(
+            presentationId=presentation_id, body={"requests": requests[start:start + max_requests]}
+        ))
+    if new_ids and not geometry["layout_id"]:
+        delete_leftover_placeholders(slides_service, presentation_id, new_ids)
+
+    print(f"✅ Updated {presentation_id}: {stats}")
+    return {"presentation_id": presentation_id, **stats}
+
+
+def load_template_pptx(drive_service, template_id):
+    """
+    Return the template as .pptx bytes. Google Slides templates are exported once per
+    modifiedTime and kept under TEMPLATE_CACHE_DIR; uploaded .pptx templates are downloaded as is.
+    """
+    from ..pptx_renderer import PPTX_MIME
+
+    meta = execute(drive_service.files().get(fileId=template_id, fields="id,mimeType,modifiedTime"))
+    version = "".join(c for c in meta.get("modifiedTime", "") if c.isalnum())
+    path = os.path.join(TEMPLATE_CACHE_DIR, f"{template_id}_{version}.pptx")
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    if meta.get("mimeType") == "application/vnd.google-apps.presentation":
+        data = execute(drive_service.files().export_media(fileId=template_id, mimeType=PPTX_MIME))
+    else:
+        data = execute(drive_service.files().get_media(fileId=template_id))
+
+    os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+    for old in os.listdir(TEMPLATE_CACHE_DIR):
+        if old.startswith(f"{template_id}_"):
+            os.remove(os.path.join(TEMPLATE_CACHE_DIR, old))
+    with open(path + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+    return data
+
+
+@tracing.traced
+def create_presentation_offline(text_pairs, TEMPLATE_ID=TEMPLATE_SUNDAY_PRESENTATION_ID, insertion_index=5, output_path=None):
+    """
+    Render the template and every lyric slide locally into a .pptx (same fonts, colors, positions
+    and background as add_lyric_slides). With output_path the deck is only written to disk and the
+    path returned; otherwise it is uploaded in one Drive files.create, converted to Google Slides,
+    and the new presentation id is returned.
+    """
+    from ..pptx_renderer import PPTX_MIME, render_deck
+
+    drive_service = get_service('drive', 'v3')
+    template = load_template_pptx(drive_service, TEMPLATE_ID)
+    with tracing.span("render_deck", slides=len(text_pairs)):
+        data = render_deck(template, text_pairs, insertion_index)
+
+    if output_path:
+        with open(output_path, "wb") as f:
+            f.write(data)
+        print(f"✅ Saved {len(text_pairs)} lyric slides to {output_path}")
+        return output_path
+
+    title = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    file_metadata = {
+        'name': title,
+        'mimeType': 'application/vnd.google-apps.presentation',
+    }
+    if TARGET_FOLDER_ID:
+        file_metadata['parents'] = [TARGET_FOLDER_ID]
+    media = MediaIoBaseUpload(io.BytesIO(data), mimetype=PPTX_MIME, resumable=len(data) > RESUMABLE_UPLOAD_BYTES)
+    file = execute(drive_service.files().create(body=file_metadata, media_body=media, fields="id"))
+
+    presentation_id = file.get('id')
+    print(f"✅ Successfully created presentation: '{title}'")
+    print(f"🔗 Link: https://docs.google.com/presentation/d/{presentation_id}/edit")
+    return presentation_id
+
+
+def presentation_url(presentation_id):
+    return "https://docs.google.com/presentation/d/{}/edit".format(presentation_id)
+
+
+def export_build_summary(presentation_id, slides):
+    """
+    Log and export the API usage of the build running in the current span.
+    """
+    summary = tracing.summarize(tracing.current_trace_id(), tracing.current_span().span_id)
+    summary.update(presentation_id=presentation_id, slides=slides)
+    tracing.export_summary(summary)
+
+
+def start_deck_build(template_id, inputs, total_slides=None, resume=True):
+    """
+    Open the journaled build of a lyric deck: the deck of an unfinished earlier build with the
+    same template and inputs (anything JSON that fixes the lyric pairs), or a fresh template copy.
+    Returns (journal key, LyricDeckWriter); the writer records each committed batch and skips
+    the slides a resumed deck already has. Finish with build_journal.finish or build_journal.fail.
+    """
+    key = build_journal.build_key(template_id, inputs)
+    if not build_journal.claim(key):
+        # the same build is running right now: give this one a deck and journal entry of its own
+        key = build_journal.build_key(template_id, [inputs, uuid.uuid4().hex])
+        build_journal.claim(key)
+    entry = build_journal.pending(key) if resume else None
+    on_commit = lambda slides: build_journal.commit(key, slides)
+    try:
+        if entry:
+            try:
+                writer = LyricDeckWriter(entry["presentation_id"], on_commit=on_commit)
+                build_journal.resumed(key)
+                print(f"↩️ Resuming {entry['presentation_id']} after {entry['committed_slides']} committed slides")
+                return key, writer
+            except HttpError as error:
+                if error.resp.status != 404:
+                    raise
+                print(f"⚠️ Presentation {entry['presentation_id']} is gone; starting the build over")
+
+        presentation_id = create_slides_file(template_id)
+        if not presentation_id:
+            raise RuntimeError("Could not copy the presentation template")
+        build_journal.start(key, template_id, presentation_id, total_slides)
+        return key, LyricDeckWriter(presentation_id, on_commit=on_commit)
+    except Exception as e:
+        build_journal.fail(key, f"{type(e).__name__}: {e}")
+        raise
+
+
+@tracing.traced
+def create_presentation(
+    text_pairs: Optional[list[dict[str, str]]] = None, TEMPLATE_ID: str = TEMPLATE_SUNDAY_PRESENTATION_ID,
+    engine: str = "slides", resume: bool = True, lyrics_handle: str = "",
+) -> str:
+    """
+    Build the lyric deck from the given template and return its URL. engine="slides" copies the
+    template and adds the slides through the Slides API; engine="pptx" renders the deck locally
+    and uploads it in a single request.
+    The lyrics are text_pairs, or the pairs stored under lyrics_handle (see lyric_store), which
+    are loaded here instead of being passed through the model.
+    With the slides engine, calling again with the same lyrics after a failure continues the
+    deck the failed call started, from its last committed batch; resume=False always starts a new one.
+    """
+    text_pairs = _pairs_or_handle(text_pairs, lyrics_handle)
+    if engine == "pptx":
+        presentation_id = create_presentation_offline(text_pairs, TEMPLATE_ID)
+    else:
+        key, writer = start_deck_build(TEMPLATE_ID, text_pairs, len(text_pairs), resume)
+        presentation_id = writer.presentation_id
+        try:
+            writer.append(text_pairs)
+        except Exception as e:
+            build_journal.fail(key, f"{type(e).__name__}: {e}")
+            raise
+        build_journal.finish(key, writer.committed)
+
+    export_build_summary(presentation_id, len(text_pairs))
+
+    url = presentation_url(presentation_id)
+    print("Presentation created with URL: " + url)
+    return url
     
 """ 
 def create_presentation_from_file(file_path: str) -> str:
@@ -275,23 +755,48 @@ def create_presentation_from_file(file_path: str) -> str:
         raise ValueError(f"Error creating presentation: {str(e)}") """
 
 
-slide_creator_agent = Agent(
-    model='gemini-2.5-flash',
-    name='SlideCreatorAgent',
-    description='An agent specialized in creating PowerPoint slides based on provided song lyrics',
-    instruction="""
+SLIDE_CREATOR_INSTRUCTION = """
         You are the Slide Creator Agent. Your task is to create PowerPoint slides based on
         the lyrics provided by the Lyric Retriever Agent. Follow these steps:
-        1. Receive a list of {"english", "korean"} objects which containing the song lyrics.
-        2. Create a new PowerPoint presentation using the create_presentation(TEMPLATE_ID) function. \
+        1. Receive a lyrics handle such as "lyr_1a2b3c4d5e6f" that refers to the stored {"english", "korean"} pairs
+            of all the songs. (If you are given the pairs themselves instead, pass them as text_pairs.)
+        2. Create a new PowerPoint presentation using the create_presentation(lyrics_handle=..., TEMPLATE_ID=...) function. \
+            Pass the handle exactly as given; never write out the lyrics yourself. \
             If the lyrics are for a Sunday service, use TEMPLATE_SUNDAY_PRESENTATION_ID. \
             If the lyrics are for a Friday service, use TEMPLATE_FRIDAY_PRESENTATION_ID.
             TEMPLATE_SUNDAY_PRESENTATION_ID = '1FCivH5ECj72APlWDdsu_3BoHZN9LWbBl'
             TEMPLATE_FRIDAY_PRESENTATION_ID = '1LevZxXZWhVzD06DYpSTbddw9-t0RlU4M'
         3. Each slide should contain a maximum of two lines for each language.
         4. Save and return the final PowerPoint presentation file.
-    """,
-    tools=[
-        create_presentation,
-    ],
-)
\ No newline at end of file
+        5. To fix lyrics or change songs in a presentation you already created, call
+            update_presentation(presentation_id, lyrics_handle=...) with the handle of the corrected set instead of
+            creating a new presentation. It only changes the slides that differ.
+        6. If create_presentation fails part way, call it again with the same lyrics and template; it
+            continues the presentation it had started instead of making a new one.
+    """
+
+
+def _build_agent():
+    from google.adk.agents import Agent
+
+    return Agent(
+        model='gemini-2.5-flash',
+        name='SlideCreatorAgent',
+        description='An agent specialized in creating PowerPoint slides based on provided song lyrics',
+        instruction=SLIDE_CREATOR_INSTRUCTION,
+        before_agent_callback=tracing.bind_invocation,
+        before_model_callback=tracing.before_model,
+        after_model_callback=tracing.after_model,
+        tools=[
+            create_presentation,
+            update_presentation,
+        ],
+    )
+
+
+def __getattr__(name):
+    # built on first access: pipeline builds call the deck functions here without the ADK
+    if name == "slide_creator_agent":
+        agent = globals()[name] = _build_agent()
+        return agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
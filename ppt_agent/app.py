@@ -0,0 +1,213 @@
+"""
+HTTP entry point for building lyric decks without the agents (run.command falls back to it):
+
+    uvicorn ppt_agent.app:app --port 8000
+
+POST /presentations runs ppt_agent.pipeline.build_presentation and waits for it;
+POST /jobs queues the same build and returns a job id to poll at GET /jobs/{id}.
+POST /batches queues the decks of several services at once (ppt_agent.batch); poll GET /batches/{id}.
+GET / serves a small form.
+"""
+import os
+from contextlib import asynccontextmanager
+from typing import Dict, List, Literal, Optional
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import HTMLResponse
+from pydantic import BaseModel
+
+from . import batch, google_clients, pipeline
+from .jobs import JobQueue
+from .lyric_translator import ModelError
+
+
+# the model key (GOOGLE_API_KEY) lives in ppt_agent/.env, which only the ADK CLI loads by itself
+load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
+
+jobs = JobQueue(pipeline.build_presentation)
+# a batch builds its services on its own worker pool (batch.MAX_BATCH_WORKERS)
+batches = JobQueue(batch.build_batch, max_workers=1)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # parse the API discovery documents now rather than on the first build
+    google_clients.preload()
+    yield
+    jobs.shutdown()
+    batches.shutdown()
+
+
+app = FastAPI(title="Lighthouse Maranatha lyric slides", lifespan=lifespan)
+
+
+class SongLyrics(BaseModel):
+    english: str = ""
+    korean: str = ""
+
+
+class PresentationRequest(BaseModel):
+    playlist_url: str
+    service: Literal["sunday", "friday"] = "sunday"
+    # lyrics for songs that are not in the Drive folder, keyed by playlist title
+    lyrics: Dict[str, SongLyrics] = {}
+    allow_missing: bool = False
+    engine: Literal["slides", "pptx"] = "slides"
+    # update this existing deck instead of creating a new one
+    presentation_id: Optional[str] = None
+    # continue the deck of an earlier build of the same set that failed part way
+    resume: bool = True
+
+    def build_args(self) -> Dict:
+        return {
+            "playlist_url": self.playlist_url,
+            "service": self.service,
+            "lyrics": {title: song.model_dump() for title, song in self.lyrics.items()},
+            "allow_missing": self.allow_missing,
+            "engine": self.engine,
+            "presentation_id": self.presentation_id,
+            "resume": self.resume,
+        }
+
+
+class JobRequest(PresentationRequest):
+    # builds are limited per user (jobs.MAX_JOBS_PER_USER at a time), e.g. "friday" / "sunday" team
+    user: str = "anonymous"
+
+
+class BatchService(BaseModel):
+    date: Optional[str] = None
+    service: Literal["sunday", "friday"] = "sunday"
+    # a playlist, or the song titles themselves
+    playlist_url: Optional[str] = None
+    songs: List[str] = []
+    lyrics: Dict[str, SongLyrics] = {}
+    allow_missing: bool = False
+    engine: Literal["slides", "pptx"] = "slides"
+    resume: bool = True
+
+
+class BatchRequest(BaseModel):
+    services: List[BatchService]
+    user: str = "anonymous"
+
+    def build_args(self) -> Dict:
+        return {"services": [s.model_dump(exclude_none=True) for s in self.services]}
+
+
+@app.post("/presentations")
+def create_presentation(req: PresentationRequest):
+    """
+    Build the deck for a playlist. Responds 200 with the presentation URL, or 409 with the
+    songs whose lyrics are missing (resubmit with `lyrics`, or with allow_missing=true).
+    503 when the model needed to translate provided lyrics is unavailable.
+    """
+    try:
+        report = pipeline.build_presentation(**req.build_args())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ModelError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    if report["status"] == "missing_lyrics":
+        raise HTTPException(status_code=409, detail=report)
+    return report
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(req: JobRequest):
+    """
+    Queue a build and return its job id at once; poll GET /jobs/{id} for progress and the result.
+    """
+    try:
+        pipeline.playlist_id_from_url(req.playlist_url)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return jobs.submit(req.user, **req.build_args()).to_dict()
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No job {job_id}")
+    return job.to_dict()
+
+
+@app.get("/jobs")
+async def list_jobs(user: Optional[str] = None):
+    return [job.to_dict() for job in jobs.list(user)]
+
+
+@app.post("/batches", status_code=202)
+async def submit_batch(req: BatchRequest):
+    """
+    Queue the decks of several services (e.g. this month's Fridays and Sundays); songs they share
+    are matched, read and aligned once. Poll GET /batches/{id}; the result lists one report per service.
+    """
+    if not req.services:
+        raise HTTPException(status_code=400, detail="No services given")
+    try:
+        for service in req.services:
+            if not service.playlist_url and not service.songs:
+                raise ValueError(f"Service {service.date or ''} {service.service} needs a playlist_url or songs")
+            if service.playlist_url:
+                pipeline.playlist_id_from_url(service.playlist_url)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return batches.submit(req.user, **req.build_args()).to_dict()
+
+
+@app.get("/batches/{batch_id}")
+async def get_batch(batch_id: str):
+    job = batches.get(batch_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No batch {batch_id}")
+    return job.to_dict()
+
+
+_FORM = """<!doctype html>
+<html><head><meta charset="utf-8"><title>Lyric slides</title></head>
+<body style="font-family: sans-serif; max-width: 40em; margin: 2em auto">
+<h1>Lyric slides</h1>
+<form id="build">
+  <p><label>YouTube playlist URL<br><input name="playlist_url" size="60" required></label></p>
+  <p><label><input type="radio" name="service" value="sunday" checked> Sunday</label>
+     <label><input type="radio" name="service" value="friday"> Friday</label></p>
+  <p><label><input type="checkbox" name="allow_missing"> Build even if some lyrics are missing</label></p>
+  <button>Create presentation</button>
+</form>
+<pre id="result"></pre>
+<script>
+document.getElementById("build").onsubmit = async (event) => {
+  event.preventDefault();
+  const form = new FormData(event.target);
+  const result = document.getElementById("result");
+  result.textContent = "Building...";
+  const response = await fetch("/presentations", {
+    method: "POST",
+    headers: {"Content-Type": "application/json"},
+    body: JSON.stringify({
+      playlist_url: form.get("playlist_url"),
+      service: form.get("service"),
+      allow_missing: form.get("allow_missing") === "on",
+    }),
+  });
+  const body = await response.json();
+  if (response.ok) {
+    result.innerHTML = `<a href="${body.presentation_url}">${body.presentation_url}</a>\\n\\n`;
+    result.append(JSON.stringify(body.songs, null, 2));
+  } else {
+    result.textContent = JSON.stringify(body.detail, null, 2);
+  }
+};
+</script>
+</body></html>
+"""
+
+
+@app.get("/", response_class=HTMLResponse)
+def index():
+    return _FORM
@@ -0,0 +1,122 @@
+"""
+Build the decks of several services in one go, e.g. a Friday and a Sunday or a whole month:
+
+    python -m ppt_agent.batch services.json [--workers 4]
+
+services.json is a list of services (or {"services": [...]}), each like
+
+    {"date": "2026-10-23", "service": "friday", "playlist_url": "https://www.youtube.com/playlist?list=..."}
+    {"date": "2026-10-25", "service": "sunday", "songs": ["주 은혜임을", "Way Maker"]}
+
+with optional "lyrics", "allow_missing" and "engine" as for POST /presentations.
+Every playlist is read first and all titles are matched in one go; a song shared by several
+services is read and aligned once (pipeline.SongCache). The decks are then built in parallel.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from . import pipeline, tracing
+
+
+MAX_BATCH_WORKERS = 4  # decks built at once; each build also streams its own slides
+
+_BUILD_KEYS = ("service", "lyrics", "allow_missing", "engine", "resume")
+
+
+def load_manifest(path: str) -> List[Dict]:
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    services = manifest["services"] if isinstance(manifest, dict) else manifest
+    if not isinstance(services, list) or not services:
+        raise ValueError(f"{path}: expected a non-empty list of services")
+    return services
+
+
+def _label(entry: Dict) -> Dict:
+    return {"date": entry.get("date"), "service": (entry.get("service") or "sunday").lower()}
+
+
+@tracing.traced
+def build_batch(
+    services: List[Dict],
+    max_workers: int = MAX_BATCH_WORKERS,
+    folder_id: str = pipeline.LYRICS_FOLDER_ID,
+    progress: Optional[Callable[..., None]] = None,
+) -> Dict:
+    """
+    Build one deck per service entry ({'date', 'service', 'playlist_url' | 'songs', ...}).
+    Returns {'status': 'done' | 'incomplete', 'services': [report per entry]}, where each report is
+    build_presentation's, with the entry's date and service, or {'status': 'failed', 'error'}.
+    """
+    progress = progress or (lambda stage, **details: None)
+    for entry in services:
+        if not entry.get("playlist_url") and not entry.get("songs"):
+            raise ValueError(f"Service {_label(entry)} needs a playlist_url or songs")
+        if entry.get("playlist_url"):
+            pipeline.playlist_id_from_url(entry["playlist_url"])
+
+    cache = pipeline.SongCache()
+    reports: List[Optional[Dict]] = [None] * len(services)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch") as pool:
+        progress("playlists", services=len(services))
+        previews = [
+            pool.submit(tracing.propagate(pipeline.playlist_titles), entry["playlist_url"])
+            if entry.get("playlist_url") else None
+            for entry in services
+        ]
+        titles: List[Optional[List[str]]] = []
+        for i, (entry, preview) in enumerate(zip(services, previews)):
+            try:
+                titles.append(preview.result() if preview else list(entry["songs"]))
+            except Exception as e:
+                titles.append(None)
+                reports[i] = {**_label(entry), "status": "failed", "error": f"{type(e).__name__}: {e}"}
+
+        # one index sync and one match for every title of the batch
+        every_title = list(dict.fromkeys(t for songs in titles if songs for t in songs))
+        progress("matching", songs=len(every_title))
+        if every_title:
+            cache.match(every_title, folder_id)
+
+        builds = {
+            i: pool.submit(tracing.propagate(pipeline.build_presentation),
+                           titles=titles[i], folder_id=folder_id, cache=cache,
+                           **{k: entry[k] for k in _BUILD_KEYS if k in entry})
+            for i, entry in enumerate(services) if reports[i] is None
+        }
+        for done, (i, future) in enumerate(builds.items()):
+            try:
+                reports[i] = {**_label(services[i]), **future.result()}
+            except Exception as e:
+                logging.exception(f"Build of {_label(services[i])} failed")
+                reports[i] = {**_label(services[i]), "status": "failed", "error": f"{type(e).__name__}: {e}"}
+            progress("building", finished=done + 1, services=len(builds))
+
+    status = "done" if all(r["status"] == "created" for r in reports) else "incomplete"
+    return {"status": status, "services": reports}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m ppt_agent.batch", description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("manifest", help="JSON list of services")
+    parser.add_argument("--workers", type=int, default=MAX_BATCH_WORKERS, help="decks built at once")
+    args = parser.parse_args(argv)
+
+    # GOOGLE_API_KEY for the model, as the ADK CLI would load it
+    load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    result = build_batch(load_manifest(args.manifest), max_workers=args.workers)
+    json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+    print()
+    return 0 if result["status"] == "done" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Local journal of lyric deck builds, so an interrupted build resumes in the deck it started
+instead of copying the template again. One row per build: the presentation, a hash of the
+build's inputs and how many lyric slides are already committed.
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from . import local_db
+
+
+JOURNAL_FILE = "./ppt_agent/builds.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    build_key TEXT PRIMARY KEY,
+    template_id TEXT NOT NULL,
+    presentation_id TEXT,
+    total_slides INTEGER,
+    committed_slides INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+# builds running in this process; two identical builds at once (say, in a batch) must not share a deck
+_active = set()
+_active_lock = threading.Lock()
+
+
+def _connect() -> sqlite3.Connection:
+    return local_db.connect(JOURNAL_FILE, _SCHEMA)
+
+
+def build_key(template_id: str, inputs: Any) -> str:
+    """
+    Identify a build by its template and a hash of its inputs (the lyric pairs, or whatever
+    determines them); rerunning the same build finds its journal entry again.
+    """
+    payload = json.dumps([template_id, inputs], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _execute(sql: str, params=()) -> Optional[sqlite3.Cursor]:
+    # the journal only saves work on a rerun; a build never fails because of it
+    try:
+        return _connect().execute(sql, params)
+    except sqlite3.Error as e:
+        logging.warning(f"Build journal unavailable: {e}")
+        return None
+
+
+def claim(key: str) -> bool:
+    """
+    Mark the build as running in this process; False if it already is. finish and fail release it.
+    """
+    with _active_lock:
+        if key in _active:
+            return False
+        _active.add(key)
+        return True
+
+
+def _release(key: str):
+    with _active_lock:
+        _active.discard(key)
+
+
+def pending(key: str) -> Optional[Dict]:
+    """
+    The unfinished build for key, if one has a presentation to resume.
+    """
+    cursor = _execute(
+        "SELECT * FROM builds WHERE build_key = ? AND status != 'done' AND presentation_id IS NOT NULL", (key,)
+    )
+    row = cursor.fetchone() if cursor else None
+    return dict(row) if row else None
+
+
+def start(key: str, template_id: str, presentation_id: str, total_slides: Optional[int] = None):
+    now = time.time()
+    _execute(
+        """
+        INSERT OR REPLACE INTO builds(build_key, template_id, presentation_id, total_slides,
+                                      committed_slides, status, error, created, updated)
+        VALUES (?, ?, ?, ?, 0, 'running', NULL, ?, ?)
+        """,
+        (key, template_id, presentation_id, total_slides, now, now),
+    )
+
+
+def _update(key: str, **values):
+    values["updated"] = time.time()
+    assignments = ", ".join(f"{column} = ?" for column in values)
+    _execute(f"UPDATE builds SET {assignments} WHERE build_key = ?", (*values.values(), key))
+
+
+def resumed(key: str):
+    _update(key, status="running", error=None)
+
+
+def commit(key: str, committed_slides: int):
+    """
+    Record that the first committed_slides lyric slides are in the deck.
+    """
+    _update(key, committed_slides=committed_slides)
+
+
+def finish(key: str, total_slides: Optional[int] = None):
+    _release(key)
+    if total_slides is None:
+        _update(key, status="done")
+    else:
+        _update(key, status="done", total_slides=total_slides, committed_slides=total_slides)
+
+
+def fail(key: str, error: str):
+    _release(key)
+    _update(key, status="failed", error=error)
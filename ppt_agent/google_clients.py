@@ -0,0 +1,346 @@
+import datetime
+import email.utils
+import functools
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+import google_auth_httplib2
+import httplib2
+from google.auth.credentials import AnonymousCredentials
+from google.oauth2.credentials import Credentials
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
+from googleapiclient.errors import HttpError
+
+from . import tracing
+
+
+# Scopes: Drive (also covers Docs and Slides), YouTube
+SCOPES = [
+    "https://www.googleapis.com/auth/drive",
+    "https://www.googleapis.com/auth/youtube.force-ssl",
+]
+
+TOKEN_FILE = "./ppt_agent/token.json"
+CREDENTIALS_FILE = "./ppt_agent/credentials.json"
+
+# Refresh the access token this long before it actually expires so a call never starts with a stale token.
+REFRESH_MARGIN = datetime.timedelta(minutes=5)
+HTTP_TIMEOUT = 60  # seconds
+# for lookups that can fall back to local data (lyrics index, offline mirror): give up on Drive sooner
+LOOKUP_TIMEOUT = 5  # seconds
+
+# Send all API traffic to another host instead of googleapis.com (e.g. the local fake server in
+# benchmarks/). Requests then go out unauthenticated.
+API_ENDPOINT = os.environ.get("PPT_AGENT_API_ENDPOINT")
+
+_credentials = None
+_credentials_lock = threading.Lock()
+# httplib2.Http is not thread-safe, so each thread keeps its own clients (and connections).
+_thread_clients = threading.local()
+# bumped whenever cached clients must be rebuilt on every thread
+_generation = 0
+
+QUOTA_REASONS = ("rateLimitExceeded", "userRateLimitExceeded", "quotaExceeded", "dailyLimitExceeded")
+# quota errors that won't clear by waiting a few seconds
+DAILY_QUOTA_REASONS = ("dailyLimitExceeded", "quotaExceeded")
+
+# Per-user request budgets, as (requests or quota units, per seconds). Slides and Docs count
+# batchUpdate as one write however many requests it carries; YouTube charges quota units per call.
+RATE_LIMITS = {
+    "slides.write": (60, 60),
+    "slides.read": (600, 60),
+    "docs.write": (60, 60),
+    "docs.read": (300, 60),
+    "drive": (12000, 60),
+    "youtube": (10000, 24 * 60 * 60),
+}
+YOUTUBE_UNITS = {"youtube.playlistItems.list": 1, "youtube.playlists.list": 1}  # other calls: 50
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0  # seconds; attempt n waits up to BACKOFF_BASE * 2**n (full jitter)
+MAX_BACKOFF = 32.0
+
+
+class _TracedHttp(google_auth_httplib2.AuthorizedHttp):
+    """
+    AuthorizedHttp that adds the size and status of every response to the current API span.
+    Also sees media download chunks, which don't go through execute().
+    """
+
+    def request(self, uri, method="GET", body=None, headers=None, **kwargs):
+        resp, content = super().request(uri, method, body=body, headers=headers, **kwargs)
+        s = tracing.current_span()
+        if s is not None and s.kind == "api":
+            s.add("response_bytes", len(content or b""))
+            s.set(status=resp.status)
+        return resp, content
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `capacity` tokens, refilled at capacity / period per second.
+    acquire() blocks until the tokens are available; pause() makes every caller wait,
+    e.g. for a Retry-After the server sent to one of them.
+    """
+
+    def __init__(self, capacity: float, period: float):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, cost: float = 1) -> float:
+        """
+        Take cost tokens, sleeping as needed; returns the seconds waited.
+        """
+        cost = min(cost, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now >= self._paused_until and self._tokens >= cost:
+                    self._tokens -= cost
+                    return waited
+                delay = max(self._paused_until - now, (cost - self._tokens) / self.rate)
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+_buckets = {name: TokenBucket(*limit) for name, limit in RATE_LIMITS.items()}
+
+
+def _bucket_for(method_id: str):
+    """
+    (bucket, cost) for an API method id such as "slides.presentations.batchUpdate".
+    """
+    api, _, method = (method_id or "").partition(".")
+    if api in ("slides", "docs"):
+        write = method.endswith(("batchUpdate", "create"))
+        return _buckets[f"{api}.{'write' if write else 'read'}"], 1
+    if api == "youtube":
+        return _buckets["youtube"], YOUTUBE_UNITS.get(method_id, 50)
+    if api == "drive":
+        return _buckets["drive"], 1
+    return None, 0
+
+
+def throttle(method_id: str) -> float:
+    """
+    Wait for the rate limit of method_id; for calls that don't go through execute()
+    (media download chunks). Returns the seconds waited.
+    """
+    bucket, cost = _bucket_for(method_id)
+    return bucket.acquire(cost) if bucket else 0.0
+
+
+def _needs_refresh(creds: Credentials) -> bool:
+    if not creds.token:
+        return True
+    if creds.expiry is None:
+        return False
+    # google-auth stores expiry as a naive UTC datetime
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    return creds.expiry - REFRESH_MARGIN <= now
+
+
+def _save_token(creds: Credentials):
+    with open(TOKEN_FILE, "w", encoding="utf-8") as token:
+        token.write(creds.to_json())
+
+
+def get_credentials(scopes=SCOPES) -> Credentials:
+    """
+    Return the process-wide OAuth2 credentials.
+    token.json is read once; afterwards the in-memory Credentials object is reused and
+    refreshed shortly before it expires. Runs the local OAuth flow only when there is no
+    usable token at all.
+    """
+    global _credentials
+    with _credentials_lock:
+        if API_ENDPOINT:
+            if _credentials is None:
+                _credentials = AnonymousCredentials()
+            return _credentials
+
+        creds = _credentials
+        if creds is None and os.path.exists(TOKEN_FILE):
+            creds = Credentials.from_authorized_user_file(TOKEN_FILE, scopes)
+
+        if creds is None or (_needs_refresh(creds) and not creds.refresh_token):
+            if not os.path.exists(CREDENTIALS_FILE):
+                raise FileNotFoundError(f"OAuth credentials file not found: {CREDENTIALS_FILE}")
+            # only needed for the first login; requests-oauthlib is slow to import
+            from google_auth_oauthlib.flow import InstalledAppFlow
+
+            flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_FILE, scopes)
+            creds = flow.run_local_server(port=0)
+            _save_token(creds)
+        elif _needs_refresh(creds):
+            from google.auth.transport.requests import Request
+
+            creds.refresh(Request())
+            _save_token(creds)
+
+        _credentials = creds
+        return creds
+
+
+@functools.lru_cache(maxsize=None)
+def _static_doc(api: str, version: str) -> dict:
+    # parsed once per process; every thread builds its clients from the same (unmodified) dict
+    doc = discovery_cache.get_static_doc(api, version)
+    if doc is None:
+        raise ValueError(f"No bundled discovery document for {api} {version}")
+    return json.loads(doc)
+
+
+def _discovery_doc(api: str, version: str) -> dict:
+    """
+    Return the discovery document bundled with googleapiclient, pointed at API_ENDPOINT if set.
+    """
+    doc = _static_doc(api, version)
+    if API_ENDPOINT:
+        root = API_ENDPOINT.rstrip("/") + "/"
+        doc = {**doc, "rootUrl": root, "mtlsRootUrl": root}
+    return doc
+
+
+def preload(apis=(("drive", "v3"), ("docs", "v1"), ("slides", "v1"), ("youtube", "v3"))):
+    """
+    Parse the discovery documents ahead of the first request (e.g. while a server starts).
+    """
+    for api, version in apis:
+        _static_doc(api, version)
+
+
+def get_service(api: str, version: str, timeout: float = HTTP_TIMEOUT):
+    """
+    Return a cached API client (e.g. get_service("drive", "v3")).
+    Clients are built once per thread from the discovery documents bundled with
+    googleapiclient and share the thread's HTTP connection pool (one per socket timeout)
+    across calls.
+    """
+    creds = get_credentials()
+    if getattr(_thread_clients, "credentials", None) is not creds or _thread_clients.generation != _generation:
+        # first call on this thread, or the credentials/endpoint changed: start fresh pools
+        _thread_clients.credentials = creds
+        _thread_clients.http = {}
+        _thread_clients.clients = {}
+        _thread_clients.generation = _generation
+
+    http = _thread_clients.http.get(timeout)
+    if http is None:
+        http = _thread_clients.http[timeout] = _TracedHttp(creds, http=httplib2.Http(timeout=timeout))
+
+    clients = _thread_clients.clients
+    key = (api, version, timeout)
+    service = clients.get(key)
+    if service is None:
+        service = build_from_document(_discovery_doc(api, version), http=http)
+        clients[key] = service
+    return service
+
+
+def reset_clients():
+    """
+    Drop the cached credentials and every thread's clients (e.g. after re-authenticating).
+    """
+    global _credentials, _generation
+    with _credentials_lock:
+        _credentials = None
+        _generation += 1
+
+
+def use_api_endpoint(endpoint: str = None):
+    """
+    Route every client to endpoint (None restores googleapis.com) and rebuild cached clients.
+    """
+    global API_ENDPOINT
+    API_ENDPOINT = endpoint
+    reset_clients()
+
+
+def is_quota_error(error: HttpError) -> bool:
+    """
+    True for 429s and for 403s whose reason is a rate or quota limit.
+    """
+    if error.resp.status == 429:
+        return True
+    return error.resp.status == 403 and any(reason.encode() in (error.content or b"") for reason in QUOTA_REASONS)
+
+
+def _retry_after(error: HttpError):
+    """
+    Seconds from the Retry-After header (delta-seconds or HTTP date), or None.
+    """
+    value = error.resp.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        when = email.utils.parsedate_to_datetime(value)
+        return max(0.0, when.timestamp() - time.time()) if when else None
+
+
+def _is_retryable(error: HttpError) -> bool:
+    if error.resp.status in RETRY_STATUSES:
+        return True
+    content = error.content or b""
+    return is_quota_error(error) and not any(reason.encode() in content for reason in DAILY_QUOTA_REASONS)
+
+
+def execute(request, retries: int = MAX_RETRIES, **kwargs):
+    """
+    Execute a googleapiclient request inside an 'api' span named after the API method
+    (e.g. "slides.presentations.batchUpdate"). Use this instead of request.execute().
+
+    Calls are paced by the per-API token buckets (RATE_LIMITS). 429s, rate-limit 403s, 5xx
+    and connection errors are retried up to `retries` times with exponential backoff and
+    full jitter, or after the server's Retry-After, which pauses the whole API bucket.
+    Callers with a local fallback pass retries=0 to get the first error straight away.
+    """
+    method_id = request.methodId or request.uri
+    bucket, cost = _bucket_for(request.methodId)
+    with tracing.span(method_id, kind="api", http_method=request.method,
+                      retries=0, quota_errors=0, response_bytes=0, throttled_ms=0) as s:
+        for attempt in range(retries + 1):
+            if bucket:
+                waited = bucket.acquire(cost)
+                if waited:
+                    s.add("throttled_ms", round(waited * 1000, 2))
+            try:
+                return request.execute(**kwargs)
+            except HttpError as e:
+                s.set(status=e.resp.status)
+                if is_quota_error(e):
+                    s.add("quota_errors", 1)
+                if attempt == retries or not _is_retryable(e):
+                    raise
+                delay = _retry_after(e)
+                if delay is not None and bucket:
+                    bucket.pause(delay)
+                error = e
+            except (OSError, httplib2.HttpLib2Error) as e:
+                # connection reset, timeout, DNS hiccup
+                if attempt == retries:
+                    raise
+                delay, error = None, e
+            if delay is None:
+                delay = random.uniform(0, min(MAX_BACKOFF, BACKOFF_BASE * 2 ** attempt))
+            s.add("retries", 1)
+            logging.warning(f"{method_id} failed ({error}); retry {attempt + 1}/{retries} in {delay:.1f}s")
+            time.sleep(delay)
@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from . import tracing
+
+
+MAX_CONCURRENT_JOBS = 4  # builds running at once; each holds one worker thread (and its own API clients)
+MAX_JOBS_PER_USER = 1  # a user's further builds wait in the queue until their current one finishes
+MAX_FINISHED_JOBS = 200  # finished jobs kept for polling
+
+
+class Job:
+    def __init__(self, user: str, params: Dict):
+        self.id = uuid.uuid4().hex[:12]
+        self.user = user
+        self.params = params
+        self.status = "queued"  # queued -> running -> done | failed
+        self.stage: Optional[str] = None
+        self.details: Dict = {}
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.trace_id: Optional[str] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def progress(self, stage: str, **details):
+        # called from the worker thread
+        with self._lock:
+            self.stage = stage
+            self.details = details
+            if self.trace_id is None:
+                self.trace_id = tracing.current_trace_id()
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "id": self.id,
+                "user": self.user,
+                "status": self.status,
+                "stage": self.stage,
+                "details": dict(self.details),
+                "result": self.result,
+                "error": self.error,
+                "trace_id": self.trace_id,
+                "created": self.created,
+                "started": self.started,
+                "finished": self.finished,
+            }
+
+
+class JobQueue:
+    """
+    Runs blocking builds as asyncio jobs. Each build runs on a bounded thread pool, so Drive and
+    Slides calls of different jobs interleave instead of queuing behind each other. A per-user
+    semaphore caps how many builds a single user runs at once.
+    """
+
+    def __init__(self, run: Callable[..., Dict], max_workers: int = MAX_CONCURRENT_JOBS,
+                 per_user: int = MAX_JOBS_PER_USER):
+        self._run = run
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="build")
+        self._per_user = per_user
+        self._user_slots: Dict[str, asyncio.Semaphore] = {}
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def submit(self, user: str, **params) -> Job:
+        """
+        Queue a build; must be called from the event loop. Returns immediately with the job.
+        """
+        job = Job(user, params)
+        self._jobs[job.id] = job
+        self._tasks[job.id] = asyncio.get_running_loop().create_task(self._execute(job))
+        self._prune()
+        return job
+
+    async def _execute(self, job: Job):
+        slots = self._user_slots.setdefault(job.user, asyncio.Semaphore(self._per_user))
+        try:
+            async with slots:
+                job.status, job.started = "running", time.time()
+                loop = asyncio.get_running_loop()
+                # run_in_executor does not carry contextvars over; the task's context has no open
+                # span, so each build starts its own trace
+                run = tracing.propagate(lambda: self._run(progress=job.progress, **job.params))
+                job.result = await loop.run_in_executor(self._executor, run)
+                job.status = "done"
+        except Exception as e:
+            logging.exception(f"Build job {job.id} failed")
+            job.status, job.error = "failed", f"{type(e).__name__}: {e}"
+        finally:
+            job.finished = time.time()
+            self._tasks.pop(job.id, None)
+
+    def _prune(self):
+        finished = [j for j in self._jobs.values() if j.finished]
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job.id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self, user: Optional[str] = None):
+        return [j for j in self._jobs.values() if user is None or j.user == user]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,97 @@
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import time
+import unicodedata
+from typing import Any, Callable, Optional
+
+from . import local_db
+
+
+CACHE_FILE = "./ppt_agent/llm_cache.sqlite3"
+MAX_CACHE_BYTES = 32 * 1024 * 1024  # least recently used entries are evicted beyond this
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    model TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries(last_used);
+"""
+
+
+def _connect() -> sqlite3.Connection:
+    return local_db.connect(CACHE_FILE, _SCHEMA)
+
+
+def normalize(text: str) -> str:
+    """
+    Normalize lyrics for the cache key: NFC, whitespace collapsed per line, no blank-line runs.
+    """
+    lines = [re.sub(r"\s+", " ", line).strip() for line in unicodedata.normalize("NFC", text or "").splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def cache_key(kind: str, source: str, direction: str, model: str) -> str:
+    return hashlib.sha256(f"{kind}\x1f{direction}\x1f{model}\x1f{normalize(source)}".encode("utf-8")).hexdigest()
+
+
+def get(kind: str, source: str, direction: str, model: str) -> Optional[Any]:
+    key = cache_key(kind, source, direction, model)
+    try:
+        conn = _connect()
+        row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+    except sqlite3.Error as e:
+        logging.warning(f"LLM cache unavailable: {e}")
+        return None
+
+
+def put(kind: str, source: str, direction: str, model: str, value: Any):
+    data = json.dumps(value, ensure_ascii=False)
+    try:
+        conn = _connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries(key, kind, model, value, size, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+            (cache_key(kind, source, direction, model), kind, model, data, len(data.encode("utf-8")), time.time()),
+        )
+        _evict(conn)
+    except sqlite3.Error as e:
+        logging.warning(f"Could not write LLM cache entry: {e}")
+
+
+def _evict(conn):
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+    if total <= MAX_CACHE_BYTES:
+        return
+    excess = total - MAX_CACHE_BYTES
+    freed = 0
+    doomed = []
+    for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_used"):
+        doomed.append((key,))
+        freed += size
+        if freed >= excess:
+            break
+    conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+
+
+def cached(kind: str, source: str, direction: str, model: str, compute: Callable[[], Any]) -> Any:
+    """
+    Return the cached result for (kind, normalized source, direction, model), or compute and store it.
+    Exceptions from compute are not cached.
+    """
+    value = get(kind, source, direction, model)
+    if value is not None:
+        return value
+    value = compute()
+    put(kind, source, direction, model, value)
+    return value
@@ -0,0 +1,31 @@
+"""
+Per-thread SQLite connections for the local stores (lyrics index, LLM cache, build journal,
+lyric store).
+"""
+import sqlite3
+import threading
+
+
+_local = threading.local()
+
+
+def connect(path: str, schema: str, autocommit: bool = True) -> sqlite3.Connection:
+    """
+    Return this thread's connection to the database at path, creating schema on first use.
+    Connections run in WAL mode and return sqlite3.Row rows. A store whose file constant is
+    pointed elsewhere (as the benchmarks do) gets a connection to the new file.
+    With autocommit, every statement commits on its own; otherwise group writes in `with conn:`.
+    """
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(path)
+    if conn is not None:
+        return conn
+
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None if autocommit else "")
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(schema)
+    conns[path] = conn
+    return conn
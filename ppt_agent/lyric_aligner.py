@@ -0,0 +1,170 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+MAX_LINES_PER_SLIDE = 2
+
+# canonical section kind for every marker spelling we have seen in the lyrics folder
+_SECTION_KINDS = {
+    "verse": "verse", "v": "verse", "절": "verse",
+    "prechorus": "prechorus", "pre chorus": "prechorus", "pre-chorus": "prechorus", "pc": "prechorus",
+    "chorus": "chorus", "c": "chorus", "refrain": "chorus", "후렴": "chorus", "코러스": "chorus",
+    "bridge": "bridge", "b": "bridge", "브릿지": "bridge", "브리지": "bridge",
+    "tag": "tag", "intro": "intro", "outro": "outro", "ending": "outro", "interlude": "interlude",
+    "간주": "interlude", "엔딩": "outro",
+}
+# one- and two-letter forms are also ordinary lyric lines ("B", "C"), so they only count as
+# markers with a number or in brackets ("V1", "[C]")
+_SHORT_KINDS = {"v", "pc", "c", "b"}
+
+_KIND_PATTERN = "|".join(sorted((re.escape(k) for k in _SECTION_KINDS), key=len, reverse=True))
+# "[Verse 1]", "Chorus:", "(Bridge)", "V2", "1절", "후렴 2" - a whole line that is only a marker
+_MARKER_RE = re.compile(
+    rf"^\s*(?P<open>[\[(])?\s*(?:(?P<num_before>\d+)\s*)?(?P<kind>{_KIND_PATTERN})\s*(?P<num>\d+)?\s*"
+    rf"(?P<close>[\])])?\s*:?\s*(?:x\s*\d+)?\s*$",
+    re.IGNORECASE,
+)
+_TITLE_RE = re.compile(r"^\s*(english|korean)\s+title\s*:", re.IGNORECASE)
+_HANGUL_RE = re.compile(r"[가-힣]")
+
+
+def _marker(line: str) -> Optional[str]:
+    """
+    Return the canonical section label of a marker line ("verse 1", "chorus"), or None.
+    """
+    m = _MARKER_RE.match(line)
+    if not m:
+        return None
+    num = m.group("num") or m.group("num_before")
+    if m.group("kind").lower() in _SHORT_KINDS and not (num or m.group("open") or m.group("close")):
+        return None
+    kind = _SECTION_KINDS[m.group("kind").lower()]
+    return f"{kind} {int(num)}" if num else kind
+
+
+def parse_sections(text: str) -> List[Dict]:
+    """
+    Split lyrics into sections: [{'label': 'verse 1' | None, 'lines': [...]}, ...].
+    A marker line starts a new section; without markers, blank lines separate sections.
+    "English Title:" / "Korean Title:" header lines (as written by drive_save_lyrics) are dropped.
+    """
+    sections: List[Dict] = []
+    current = {"label": None, "lines": []}
+    for raw in (text or "").splitlines():
+        line = raw.strip()
+        if _TITLE_RE.match(line):
+            continue
+        label = _marker(line)
+        if label is not None:
+            if current["lines"]:
+                sections.append(current)
+            current = {"label": label, "lines": []}
+        elif not line:
+            # blank lines right after a marker don't end its section
+            if current["lines"]:
+                sections.append(current)
+                current = {"label": None, "lines": []}
+        else:
+            current["lines"].append(line)
+    if current["lines"]:
+        sections.append(current)
+    return sections
+
+
+def split_languages(text: str) -> Tuple[str, str]:
+    """
+    Split a lyric file that holds both languages into (english, korean).
+    Lines with Hangul go to Korean, other lines to English; markers and blank lines are kept in both
+    so section boundaries survive. Works for both "all English then all Korean" and slide-by-slide files.
+    """
+    english, korean = [], []
+    for raw in (text or "").splitlines():
+        line = raw.strip()
+        if _TITLE_RE.match(line):
+            continue
+        if not line or _marker(line) is not None:
+            english.append(line)
+            korean.append(line)
+        elif _HANGUL_RE.search(line):
+            korean.append(line)
+        else:
+            english.append(line)
+    return "\n".join(english), "\n".join(korean)
+
+
+def chunk_lines(english: List[str], korean: List[str], max_lines: int = MAX_LINES_PER_SLIDE) -> List[Dict[str, str]]:
+    """
+    Turn two equally long line lists into {"english", "korean"} slide pairs of at most max_lines lines.
+    """
+    return [
+        {"english": "\n".join(english[i:i + max_lines]), "korean": "\n".join(korean[i:i + max_lines])}
+        for i in range(0, len(english), max_lines)
+    ]
+
+
+def _pair_sections(eng: List[Dict], kor: List[Dict]) -> Optional[List[Tuple[Dict, Dict]]]:
+    """
+    Pair English and Korean sections, or None when the structures don't correspond.
+    """
+    eng_labels = [s["label"] for s in eng]
+    kor_labels = [s["label"] for s in kor]
+    if len(eng) == len(kor) and (eng_labels == kor_labels or not any(eng_labels) or not any(kor_labels)):
+        return list(zip(eng, kor))
+
+    if any(eng_labels) and any(kor_labels):
+        # both labelled but in a different order or count (e.g. the chorus is only written out once
+        # in one language): pair every English section with the Korean section of the same label
+        by_label = {}
+        for s in kor:
+            by_label.setdefault(s["label"], s)
+        if all(label in by_label for label in eng_labels):
+            return [(s, by_label[s["label"]]) for s in eng]
+    return None
+
+
+def align_lyrics(english: str, korean: str = "") -> Dict:
+    """
+    Align English and Korean lyrics by section and line count and chunk them into slide pairs.
+    If korean is empty, english is treated as a file containing both languages.
+    Returns {'pairs': [{"english", "korean"}...], 'ambiguous': [...]}. Sections whose line counts
+    don't match are left out of 'pairs' and listed in 'ambiguous' as
+    {'position', 'label', 'english', 'korean'}; 'position' is the index in 'pairs' where that
+    section's pairs belong (see splice_pairs).
+    """
+    if not korean:
+        english, korean = split_languages(english)
+
+    eng_sections = parse_sections(english)
+    kor_sections = parse_sections(korean)
+
+    paired = _pair_sections(eng_sections, kor_sections)
+    if paired is None:
+        eng_lines = [line for s in eng_sections for line in s["lines"]]
+        kor_lines = [line for s in kor_sections for line in s["lines"]]
+        # section structure differs but the songs still line up line for line
+        paired = [({"label": None, "lines": eng_lines}, {"label": None, "lines": kor_lines})]
+
+    pairs: List[Dict[str, str]] = []
+    ambiguous: List[Dict] = []
+    for eng, kor in paired:
+        if len(eng["lines"]) == len(kor["lines"]):
+            pairs.extend(chunk_lines(eng["lines"], kor["lines"]))
+        else:
+            ambiguous.append({
+                "position": len(pairs),
+                "label": eng["label"] or kor["label"],
+                "english": "\n".join(eng["lines"]),
+                "korean": "\n".join(kor["lines"]),
+            })
+    return {"pairs": pairs, "ambiguous": ambiguous}
+
+
+def splice_pairs(pairs: List[Dict[str, str]], ambiguous: List[Dict], resolved: List[List[Dict[str, str]]]) -> List[Dict[str, str]]:
+    """
+    Insert the pairs produced for each ambiguous section (resolved[i] for ambiguous[i]) at their positions.
+    """
+    out = list(pairs)
+    # ambiguous is ordered by position; insert from the back so earlier positions stay valid
+    for section, section_pairs in reversed(list(zip(ambiguous, resolved))):
+        out[section["position"]:section["position"]] = section_pairs
+    return out
@@ -0,0 +1,70 @@
+"""
+Lyric pair lists kept on disk under short handles, so the agents pass "lyr_…" between each other
+instead of re-emitting a whole set of lyrics as JSON in every tool call.
+"""
+import hashlib
+import json
+import sqlite3
+import time
+from typing import Dict, List, Optional
+
+from . import local_db
+
+
+STORE_FILE = "./ppt_agent/lyric_store.sqlite3"
+HANDLE_PREFIX = "lyr_"
+MAX_AGE_DAYS = 60  # handles unused for this long are dropped
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lyrics (
+    handle TEXT PRIMARY KEY,
+    title TEXT,
+    pairs TEXT NOT NULL,
+    slides INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS lyrics_last_used ON lyrics(last_used);
+"""
+
+
+def _connect() -> sqlite3.Connection:
+    return local_db.connect(STORE_FILE, _SCHEMA)
+
+
+def put(pairs: List[Dict[str, str]], title: Optional[str] = None) -> str:
+    """
+    Store a list of {"english", "korean"} pairs (optionally with "song") and return its handle.
+    Handles are content addresses: storing the same pairs again returns the same handle.
+    """
+    data = json.dumps(pairs, ensure_ascii=False, sort_keys=True)
+    handle = HANDLE_PREFIX + hashlib.sha256(f"{title or ''}\x1f{data}".encode("utf-8")).hexdigest()[:12]
+    now = time.time()
+    conn = _connect()
+    conn.execute(
+        "INSERT OR REPLACE INTO lyrics(handle, title, pairs, slides, last_used) VALUES (?, ?, ?, ?, ?)",
+        (handle, title, data, len(pairs), now),
+    )
+    conn.execute("DELETE FROM lyrics WHERE last_used < ?", (now - MAX_AGE_DAYS * 86400,))
+    return handle
+
+
+def get(handle: str) -> Optional[Dict]:
+    """
+    Return {'handle', 'title', 'pairs'} for a handle, or None if it is unknown.
+    """
+    conn = _connect()
+    row = conn.execute("SELECT title, pairs FROM lyrics WHERE handle = ?", (handle.strip(),)).fetchone()
+    if row is None:
+        return None
+    conn.execute("UPDATE lyrics SET last_used = ? WHERE handle = ?", (time.time(), handle.strip()))
+    return {"handle": handle.strip(), "title": row[0], "pairs": json.loads(row[1])}
+
+
+def load(handle: str) -> List[Dict[str, str]]:
+    """
+    The pairs stored under handle; raises ValueError for an unknown handle.
+    """
+    entry = get(handle)
+    if entry is None:
+        raise ValueError(f"Unknown lyrics handle {handle!r}")
+    return entry["pairs"]
@@ -0,0 +1,103 @@
+import json
+import logging
+from typing import Dict, List
+
+from . import llm_cache, tracing
+from .lyric_aligner import align_lyrics, chunk_lines, splice_pairs
+
+
+LLM_MODEL = 'gemini-2.5-flash'
+
+
+class ModelError(RuntimeError):
+    """
+    The model could not be called (no API key, quota, network) or gave an unusable answer.
+    """
+
+
+def _generate_json(prompt: str):
+    """
+    One JSON-mode call to the model. Raises ModelError when it fails.
+    """
+    from google import genai
+    from google.genai.types import GenerateContentConfig
+
+    try:
+        with tracing.span(f"llm:{LLM_MODEL}", kind="model", model=LLM_MODEL):
+            response = genai.Client().models.generate_content(
+                model=LLM_MODEL,
+                contents=prompt,
+                config=GenerateContentConfig(temperature=0.01, response_mime_type="application/json"),
+            )
+        return json.loads(response.text)
+    except Exception as e:
+        raise ModelError(f"{LLM_MODEL} call failed: {type(e).__name__}: {e}") from e
+
+
+def resolve_section(section: Dict) -> List[Dict[str, str]]:
+    """
+    Ask the model to pair one ambiguous section (line counts differ between the languages).
+    Results are cached by the section's text (see llm_cache).
+    """
+    def compute():
+        pairs = _generate_json(
+            "Pair these English and Korean worship song lyrics line by line, following the meaning. "
+            "Do not add, translate or drop lyrics; you may only merge or split lines so both sides match. "
+            "Return a JSON list of {\"english\": ..., \"korean\": ...} objects with at most two lines "
+            "(separated by \\n) per value.\n\n"
+            f"English:\n{section['english']}\n\nKorean:\n{section['korean']}"
+        )
+        return [{"english": p["english"], "korean": p["korean"]} for p in pairs]
+
+    source = f"{section['english']}\n\x1e\n{section['korean']}"
+    return llm_cache.cached("alignment", source, "english-korean", LLM_MODEL, compute)
+
+
+def translate(text: str, target: str) -> str:
+    """
+    Translate lyrics into target ('english' or 'korean') keeping the line and section structure.
+    Results are cached by the normalized source lyrics, direction and model (see llm_cache).
+    Raises ModelError when the model is unavailable.
+    """
+    def compute():
+        result = _generate_json(
+            f"Translate these worship song lyrics into {target.title()}. Keep exactly one output line per "
+            "input line and keep section markers such as [Verse 1] unchanged. Stay faithful to the meaning. "
+            "Return a JSON object {\"lyrics\": \"...\"}.\n\n" + text
+        )
+        if not isinstance(result, dict) or not isinstance(result.get("lyrics"), str):
+            raise ModelError(f"{LLM_MODEL} returned no translation")
+        return result["lyrics"]
+
+    return llm_cache.cached("translation", text, f"to-{target.lower()}", LLM_MODEL, compute)
+
+
+def _naive_pairs(section: Dict) -> List[Dict[str, str]]:
+    """
+    Fallback when the model is unavailable: pad the shorter language so the slides still show every line.
+    """
+    english = section["english"].split("\n")
+    korean = section["korean"].split("\n")
+    size = max(len(english), len(korean))
+    return chunk_lines(english + [""] * (size - len(english)), korean + [""] * (size - len(korean)))
+
+
+def song_pairs(english: str, korean: str = "") -> Dict:
+    """
+    Align one song and resolve its ambiguous sections with the model.
+    Returns {'pairs', 'llm_sections', 'unresolved_sections'}.
+    """
+    aligned = align_lyrics(english, korean)
+    resolved, unresolved = [], 0
+    for section in aligned["ambiguous"]:
+        try:
+            resolved.append(resolve_section(section))
+        except Exception as e:
+            logging.warning(f"Could not align section {section['label']!r} with the model: {e}")
+            resolved.append(_naive_pairs(section))
+            unresolved += 1
+    return {
+        "pairs": splice_pairs(aligned["pairs"], aligned["ambiguous"], resolved),
+        "llm_sections": len(aligned["ambiguous"]) - unresolved,
+        "unresolved_sections": unresolved,
+    }
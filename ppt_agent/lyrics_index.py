@@ -0,0 +1,273 @@
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from . import local_db
+from .google_clients import MAX_RETRIES, execute
+
+
+INDEX_FILE = "./ppt_agent/lyrics_index.sqlite3"
+# Don't hit the changes feed more than once per interval; lookups in between are served from the index.
+SYNC_INTERVAL = 60  # seconds
+
+_FILE_FIELDS = "id, name, mimeType, modifiedTime, trashed, parents"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id TEXT PRIMARY KEY,
+    folder_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    mime_type TEXT,
+    modified_time TEXT,
+    content TEXT,
+    content_modified_time TEXT
+);
+CREATE INDEX IF NOT EXISTS files_folder ON files(folder_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5(
+    id UNINDEXED, name, content, tokenize='trigram'
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_last_sync: Dict[str, float] = {}
+_sync_lock = threading.Lock()
+
+
+def _connect() -> sqlite3.Connection:
+    return local_db.connect(INDEX_FILE, _SCHEMA, autocommit=False)
+
+
+def _get_meta(conn, key: str) -> Optional[str]:
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row["value"] if row else None
+
+
+def _set_meta(conn, key: str, value: str):
+    conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", (key, value))
+
+
+def _upsert(conn, folder_id: str, file: Dict, content: Optional[str] = None):
+    conn.execute(
+        """
+        INSERT INTO files(id, folder_id, name, mime_type, modified_time) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            folder_id = excluded.folder_id,
+            name = excluded.name,
+            mime_type = excluded.mime_type,
+            modified_time = excluded.modified_time
+        """,
+        (file["id"], folder_id, file.get("name") or "", file.get("mimeType"), file.get("modifiedTime")),
+    )
+    if content is not None:
+        conn.execute(
+            "UPDATE files SET content = ?, content_modified_time = ? WHERE id = ?",
+            (content, file.get("modifiedTime"), file["id"]),
+        )
+    row = conn.execute("SELECT name, content FROM files WHERE id = ?", (file["id"],)).fetchone()
+    conn.execute("DELETE FROM files_fts WHERE id = ?", (file["id"],))
+    conn.execute(
+        "INSERT INTO files_fts(id, name, content) VALUES (?, ?, ?)",
+        (file["id"], row["name"], row["content"] or ""),
+    )
+
+
+def _remove(conn, file_id: str):
+    conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+    conn.execute("DELETE FROM files_fts WHERE id = ?", (file_id,))
+
+
+def _full_listing(drive_service, conn, folder_id: str, retries: int = MAX_RETRIES):
+    """
+    Index every file in the folder from scratch.
+    """
+    seen = set()
+    page_token = None
+    while True:
+        res = execute(drive_service.files().list(
+            q=f"'{folder_id}' in parents and trashed=false",
+            spaces="drive",
+            fields=f"nextPageToken, files({_FILE_FIELDS})",
+            pageSize=1000,
+            pageToken=page_token,
+        ), retries=retries)
+        for file in res.get("files", []):
+            seen.add(file["id"])
+            _upsert(conn, folder_id, file)
+        page_token = res.get("nextPageToken")
+        if not page_token:
+            break
+
+    for row in conn.execute("SELECT id FROM files WHERE folder_id = ?", (folder_id,)).fetchall():
+        if row["id"] not in seen:
+            _remove(conn, row["id"])
+
+
+def _apply_changes(drive_service, conn, folder_id: str, page_token: str, retries: int = MAX_RETRIES) -> str:
+    """
+    Apply the Drive changes feed since page_token to the index and return the new start token.
+    """
+    while True:
+        res = execute(drive_service.changes().list(
+            pageToken=page_token,
+            spaces="drive",
+            includeRemoved=True,
+            pageSize=1000,
+            fields=f"nextPageToken, newStartPageToken, changes(fileId, removed, file({_FILE_FIELDS}))",
+        ), retries=retries)
+        for change in res.get("changes", []):
+            file = change.get("file") or {}
+            in_folder = folder_id in (file.get("parents") or [])
+            if change.get("removed") or file.get("trashed") or not in_folder:
+                # deleted, trashed or moved out of the lyrics folder
+                _remove(conn, change["fileId"])
+            else:
+                _upsert(conn, folder_id, file)
+        if res.get("newStartPageToken"):
+            return res["newStartPageToken"]
+        page_token = res["nextPageToken"]
+
+
+def sync(drive_service, folder_id: str, force: bool = False, retries: int = MAX_RETRIES):
+    """
+    Bring the local index of folder_id up to date.
+    The first sync lists the whole folder; later syncs only read the Drive changes feed,
+    at most once every SYNC_INTERVAL seconds unless force is set. Content is not downloaded
+    here - files whose modifiedTime moved on are refetched lazily by the caller.
+    retries is passed on to execute().
+    """
+    with _sync_lock:
+        if not force and time.monotonic() - _last_sync.get(folder_id, float("-inf")) < SYNC_INTERVAL:
+            return
+
+        conn = _connect()
+        token_key = f"changes_token:{folder_id}"
+        with conn:
+            page_token = _get_meta(conn, token_key)
+            if page_token is None:
+                # take the start token before listing so nothing that changes during the listing is missed
+                start = execute(drive_service.changes().getStartPageToken(), retries=retries)["startPageToken"]
+                _full_listing(drive_service, conn, folder_id, retries)
+                new_token = start
+            else:
+                new_token = _apply_changes(drive_service, conn, folder_id, page_token, retries)
+            _set_meta(conn, token_key, new_token)
+
+        _last_sync[folder_id] = time.monotonic()
+        logging.info(f"Lyrics index synced for folder {folder_id}")
+
+
+def is_synced(folder_id: str) -> bool:
+    """
+    True once the folder has been listed into the index at least once.
+    """
+    return _get_meta(_connect(), f"changes_token:{folder_id}") is not None
+
+
+def changes_token(folder_id: str) -> Optional[str]:
+    """
+    The Drive changes-feed position the index of folder_id is synced to, or None.
+    """
+    return _get_meta(_connect(), f"changes_token:{folder_id}")
+
+
+def load_snapshot(folder_id: str, files: List[Dict], token: str):
+    """
+    Fill an index that has never been synced from a snapshot of the folder (the offline mirror's
+    manifest) taken at changes-feed position token. The next sync applies only what changed since.
+    Content is not copied; it stays in the snapshot.
+    """
+    conn = _connect()
+    with conn:
+        if _get_meta(conn, f"changes_token:{folder_id}") is not None:
+            return
+        for file in files:
+            _upsert(conn, folder_id, file)
+        _set_meta(conn, f"changes_token:{folder_id}", token)
+
+
+def search(folder_id: str, text: str, limit: int = 20) -> List[Dict]:
+    """
+    Return indexed files in folder_id whose name contains text (case-insensitive),
+    as [{'id', 'name', 'mimeType', 'modifiedTime'}], exact and prefix matches first.
+    """
+    conn = _connect()
+    text = (text or "").strip()
+    if len(text) >= 3:
+        # the trigram tokenizer answers substring queries straight from the FTS index
+        phrase = '"' + text.replace('"', '""') + '"'
+        rows = conn.execute(
+            """
+            SELECT f.id, f.name, f.mime_type, f.modified_time FROM files_fts
+            JOIN files f ON f.id = files_fts.id
+            WHERE files_fts.name MATCH ? AND f.folder_id = ?
+            """,
+            (phrase, folder_id),
+        ).fetchall()
+    else:
+        rows = conn.execute(
+            "SELECT id, name, mime_type, modified_time FROM files WHERE folder_id = ? AND name LIKE ?",
+            (folder_id, f"%{text}%"),
+        ).fetchall()
+
+    lowered = text.lower()
+
+    def rank(row):
+        name = row["name"].lower()
+        return (name != lowered, not name.startswith(lowered), len(name), name)
+
+    return [
+        {"id": r["id"], "name": r["name"], "mimeType": r["mime_type"], "modifiedTime": r["modified_time"]}
+        for r in sorted(rows, key=rank)[:limit]
+    ]
+
+
+def list_files(folder_id: str) -> List[Dict]:
+    """
+    Return every indexed file in folder_id as [{'id', 'name', 'mimeType', 'modifiedTime'}].
+    """
+    rows = _connect().execute(
+        "SELECT id, name, mime_type, modified_time FROM files WHERE folder_id = ? ORDER BY name", (folder_id,)
+    ).fetchall()
+    return [
+        {"id": r["id"], "name": r["name"], "mimeType": r["mime_type"], "modifiedTime": r["modified_time"]}
+        for r in rows
+    ]
+
+
+def get_file(file_id: str) -> Optional[Dict]:
+    """
+    Return the indexed metadata of a file as {'id', 'name', 'mimeType', 'modifiedTime'}, or None.
+    """
+    row = _connect().execute(
+        "SELECT id, name, mime_type, modified_time FROM files WHERE id = ?", (file_id,)
+    ).fetchone()
+    if row is None:
+        return None
+    return {"id": row["id"], "name": row["name"], "mimeType": row["mime_type"], "modifiedTime": row["modified_time"]}
+
+
+def get_content(file_id: str, modified_time: Optional[str]) -> Optional[str]:
+    """
+    Return the cached text of a file if it was extracted at modified_time, else None.
+    """
+    row = _connect().execute(
+        "SELECT content, content_modified_time FROM files WHERE id = ?", (file_id,)
+    ).fetchone()
+    if row is None or row["content"] is None or row["content_modified_time"] != modified_time:
+        return None
+    return row["content"]
+
+
+def store_file(folder_id: str, file: Dict, content: Optional[str] = None):
+    """
+    Write a file's metadata (and optionally its extracted text) through to the index.
+    file needs 'id', 'name', 'mimeType' and 'modifiedTime'.
+    """
+    conn = _connect()
+    with conn:
+        _upsert(conn, folder_id, file, content)
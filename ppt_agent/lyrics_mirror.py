@@ -0,0 +1,261 @@
+"""
+Offline mirror of the lyrics folder: every file's text in one compact corpus file, so lyrics can
+be looked up without Drive (slow church Wi-Fi, no network at all).
+
+    python -m ppt_agent.lyrics_mirror [--folder <id>]
+
+builds or refreshes the mirror; a refresh only downloads the files whose modifiedTime changed.
+Per folder, MIRROR_DIR holds
+  <folder>.<n>.corpus     header, offset table, then each file's zlib-compressed UTF-8 text
+  <folder>.manifest.json  folder id, Drive changes token, the name of the current corpus and
+                          [{id, name, mimeType, modifiedTime}] in corpus order
+The corpus is memory-mapped, so a lookup decompresses just the one file it needs. Each refresh
+writes a new corpus, so lookups still reading the previous one are not cut off.
+Set PPT_AGENT_OFFLINE=1 to skip Drive entirely and serve from the index and the mirror.
+"""
+import argparse
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional
+
+from . import lyrics_index
+
+
+MIRROR_DIR = "./ppt_agent/mirror"
+LYRICS_FOLDER_ID = '1hiSf6DSAO2RIv7ZCT7ltU8uBYQFvaOQu'
+OFFLINE_RETRY_SECONDS = 300  # after Drive was unreachable, don't try it again for this long
+
+_MAGIC = b"LYRMIR01"
+_HEADER = struct.Struct("<8sI")  # magic, file count
+_ENTRY = struct.Struct("<QII")  # offset into the blob, compressed length, text length
+
+_mirrors: Dict[str, tuple] = {}  # folder id -> (manifest mtime, Mirror)
+_mirrors_lock = threading.Lock()
+_offline_until = 0.0
+
+
+def offline() -> bool:
+    """
+    True when Drive should not be tried: PPT_AGENT_OFFLINE is set, or it was just unreachable.
+    """
+    return os.environ.get("PPT_AGENT_OFFLINE") == "1" or time.monotonic() < _offline_until
+
+
+def mark_offline():
+    global _offline_until
+    _offline_until = time.monotonic() + OFFLINE_RETRY_SECONDS
+
+
+def _manifest_path(folder_id: str) -> str:
+    return os.path.join(MIRROR_DIR, f"{folder_id}.manifest.json")
+
+
+class Mirror:
+    """
+    Read access to one folder's corpus and manifest. The mapping is closed when the last
+    reader drops the object, so a refresh never pulls it out from under a lookup.
+    """
+
+    def __init__(self, manifest_path: str):
+        with open(manifest_path, encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.files: List[Dict] = self.manifest["files"]
+        corpus_path = os.path.join(os.path.dirname(manifest_path), self.manifest["corpus"])
+        self._file = open(corpus_path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC or count != len(self.files):
+            self.close()
+            raise ValueError(f"{corpus_path} does not match {manifest_path}")
+        self._blob = _HEADER.size + count * _ENTRY.size
+        self._by_id = {file["id"]: i for i, file in enumerate(self.files)}
+
+    def entry(self, file_id: str) -> Optional[Dict]:
+        i = self._by_id.get(file_id)
+        return None if i is None else self.files[i]
+
+    def compressed(self, file_id: str):
+        """
+        (zlib-compressed text, text length in bytes) of a mirrored file.
+        """
+        offset, size, length = _ENTRY.unpack_from(self._map, _HEADER.size + self._by_id[file_id] * _ENTRY.size)
+        return self._map[self._blob + offset:self._blob + offset + size], length
+
+    def text(self, file_id: str, modified_time: Optional[str] = None) -> Optional[str]:
+        """
+        The file's text, or None if it is not mirrored (or not at modified_time, when given).
+        """
+        entry = self.entry(file_id)
+        if entry is None or (modified_time is not None and entry.get("modifiedTime") != modified_time):
+            return None
+        return zlib.decompress(self.compressed(file_id)[0]).decode("utf-8")
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def open_mirror(folder_id: str) -> Optional[Mirror]:
+    """
+    The folder's mirror, or None if there is none. Reopened when a refresh replaced it.
+    """
+    manifest_path = _manifest_path(folder_id)
+    try:
+        mtime = os.stat(manifest_path).st_mtime_ns
+    except OSError:
+        return None
+    with _mirrors_lock:
+        cached = _mirrors.get(folder_id)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        try:
+            mirror = Mirror(manifest_path)
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"Lyrics mirror for {folder_id} is unreadable: {e}")
+            return None
+        _mirrors[folder_id] = (mtime, mirror)
+        return mirror
+
+
+def seed_index(folder_id: str) -> bool:
+    """
+    Fill a lyrics index that has never been synced from the mirror's manifest, so titles can be
+    matched without Drive. Returns True if the index was seeded.
+    """
+    mirror = open_mirror(folder_id)
+    if mirror is None or lyrics_index.is_synced(folder_id) or not mirror.manifest.get("changes_token"):
+        return False
+    lyrics_index.load_snapshot(folder_id, mirror.files, mirror.manifest["changes_token"])
+    logging.info(f"Lyrics index for {folder_id} seeded from the offline mirror ({len(mirror.files)} files)")
+    return True
+
+
+def _write(path: str, data: bytes):
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def write_mirror(folder_id: str, files: List[Dict], compressed: List[bytes], lengths: List[int], token: str):
+    """
+    Write a new corpus and then the manifest naming it; readers only pick up the new corpus
+    with its manifest. Corpora older than the one it replaces are deleted.
+    """
+    manifest_path = _manifest_path(folder_id)
+    os.makedirs(MIRROR_DIR, exist_ok=True)
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            previous = json.load(f).get("corpus")
+    except (OSError, ValueError):
+        previous = None
+    corpus_name = f"{folder_id}.{time.time_ns()}.corpus"
+    table, offset = [], 0
+    for blob, length in zip(compressed, lengths):
+        table.append(_ENTRY.pack(offset, len(blob), length))
+        offset += len(blob)
+    corpus = _HEADER.pack(_MAGIC, len(files)) + b"".join(table) + b"".join(compressed)
+    manifest = {
+        "folder_id": folder_id,
+        "changes_token": token,
+        "corpus": corpus_name,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "files": [{k: file.get(k) for k in ("id", "name", "mimeType", "modifiedTime")} for file in files],
+    }
+    _write(os.path.join(MIRROR_DIR, corpus_name), corpus)
+    _write(manifest_path, json.dumps(manifest, ensure_ascii=False).encode("utf-8"))
+
+    # a lookup that read the previous manifest may still be opening its corpus, so that one stays
+    for name in os.listdir(MIRROR_DIR):
+        if name.startswith(f"{folder_id}.") and name.endswith(".corpus") and name not in (corpus_name, previous):
+            try:
+                os.remove(os.path.join(MIRROR_DIR, name))
+            except OSError:
+                pass  # still mapped by a reader (Windows); the next refresh removes it
+
+
+def refresh(folder_id: str = LYRICS_FOLDER_ID) -> Dict:
+    """
+    Bring the mirror up to date with Drive. The lyrics index is synced first (changes feed);
+    files whose id and modifiedTime are already mirrored are copied over as they are, the rest
+    are taken from the lyrics index when it holds their current text, or downloaded in parallel.
+    A file that cannot be downloaded keeps its older mirrored copy.
+    Returns {'files', 'downloaded', 'from_index', 'reused', 'failed', 'bytes', 'text_bytes'}.
+    """
+    from .agents.lyric_retriever_agent import fetch_contents
+    from .google_clients import get_service
+
+    lyrics_index.sync(get_service("drive", "v3"), folder_id, force=True)
+    token = lyrics_index.changes_token(folder_id)
+    listing = lyrics_index.list_files(folder_id)
+    old = open_mirror(folder_id)
+
+    def mirrored(file):
+        entry = old.entry(file["id"]) if old else None
+        return entry is not None and entry.get("modifiedTime") == file.get("modifiedTime")
+
+    todo = [file for file in listing if not mirrored(file)]
+    indexed = {
+        file["id"] for file in todo if lyrics_index.get_content(file["id"], file.get("modifiedTime")) is not None
+    }
+    # the mirror itself must not answer for the files it is being refreshed with
+    texts = dict(zip((file["id"] for file in todo), fetch_contents(todo, folder_id, use_mirror=False)))
+
+    files, compressed, lengths = [], [], []
+    failed = reused = 0
+    for file in listing:
+        text = texts.get(file["id"])
+        if text is not None:
+            data = text.encode("utf-8")
+            blob, length = zlib.compress(data, 9), len(data)
+        elif old and old.entry(file["id"]):
+            if file["id"] in texts:
+                # the download failed: keep the older copy, under its own modifiedTime so the next refresh retries
+                failed += 1
+                file = old.entry(file["id"])
+            else:
+                reused += 1
+            blob, length = old.compressed(file["id"])
+        else:
+            failed += 1
+            continue
+        files.append(file)
+        compressed.append(blob)
+        lengths.append(length)
+
+    write_mirror(folder_id, files, compressed, lengths, token)
+    fetched = [file_id for file_id, text in texts.items() if text is not None]
+    return {
+        "files": len(files),
+        "downloaded": sum(file_id not in indexed for file_id in fetched),
+        "from_index": sum(file_id in indexed for file_id in fetched),
+        "reused": reused,
+        "failed": failed,
+        "bytes": sum(len(blob) for blob in compressed),
+        "text_bytes": sum(lengths),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m ppt_agent.lyrics_mirror", description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--folder", default=LYRICS_FOLDER_ID, help="Drive folder to mirror")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    start = time.perf_counter()
+    summary = refresh(args.folder)
+    print(f"Mirrored {summary['files']} files ({summary['downloaded']} downloaded, {summary['from_index']} from the "
+          f"lyrics index, {summary['reused']} unchanged, "
+          f"{summary['failed']} failed): {summary['bytes']} bytes for {summary['text_bytes']} bytes of text "
+          f"in {time.perf_counter() - start:.1f}s")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
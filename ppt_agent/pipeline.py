@@ -0,0 +1,296 @@
+import logging
+import queue
+import re
+import threading
+import urllib.parse
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from googleapiclient.errors import HttpError
+
+from . import build_journal, lyrics_index, tracing
+from .agents import lyric_retriever_agent as retriever
+from .agents import slide_creator_agent as creator
+from .lyric_translator import song_pairs, translate
+
+
+LYRICS_FOLDER_ID = '1hiSf6DSAO2RIv7ZCT7ltU8uBYQFvaOQu'
+TEMPLATES = {
+    "sunday": creator.TEMPLATE_SUNDAY_PRESENTATION_ID,
+    "friday": creator.TEMPLATE_FRIDAY_PRESENTATION_ID,
+}
+MIN_MATCH_SCORE = 0.6  # below this a playlist title is treated as not in Drive
+STREAM_QUEUE_SIZE = 2  # aligned songs waiting for the Slides writer before alignment pauses
+
+_PLAYLIST_ID_RE = re.compile(r"^[A-Za-z0-9_-]{10,}$")
+
+
+def playlist_id_from_url(url: str) -> str:
+    """
+    Accept a YouTube playlist URL (…?list=<id>) or a bare playlist id.
+    """
+    url = (url or "").strip()
+    query = urllib.parse.parse_qs(urllib.parse.urlparse(url).query)
+    if query.get("list"):
+        return query["list"][0]
+    if _PLAYLIST_ID_RE.match(url):
+        return url
+    raise ValueError(f"Not a YouTube playlist URL: {url!r}")
+
+
+class SongCache:
+    """
+    The per-song work of a build - title matches, file reads and alignments - done once and
+    shared by every build given the same cache (the services of a batch, see ppt_agent.batch).
+    Safe to use from several threads; a second caller waits for the first one's result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._memo: Dict[Any, Future] = {}
+        self._matches: Dict[tuple, List[Dict]] = {}
+
+    def memo(self, key, compute: Callable[[], Any]):
+        with self._lock:
+            future = self._memo.get(key)
+            owner = future is None
+            if owner:
+                future = self._memo[key] = Future()
+        if owner:
+            try:
+                future.set_result(compute())
+            except Exception as e:
+                future.set_exception(e)
+        return future.result()
+
+    def match(self, titles: List[str], folder_id: str) -> Optional[Dict[str, List[Dict]]]:
+        """
+        retriever.match_song_titles, asking only for the titles not matched through this cache yet.
+        """
+        with self._lock:
+            todo = [t for t in dict.fromkeys(titles) if (folder_id, t) not in self._matches]
+        if todo:
+            found = retriever.match_song_titles(todo, folder_id)
+            if found is None:
+                return None
+            with self._lock:
+                self._matches.update(((folder_id, t), found.get(t) or []) for t in todo)
+        with self._lock:
+            return {t: self._matches[(folder_id, t)] for t in titles}
+
+
+def _tagged_pairs(song: Dict) -> List[Dict[str, str]]:
+    return [{**pair, "song": song["title"]} for pair in song["pairs"]]
+
+
+def _stream_to_deck(template_id: str, songs: Iterable[Dict], inputs: Dict, resume: bool = True):
+    """
+    Copy the template and write each song's slides as soon as the song is aligned.
+    A writer thread creates the deck and appends the songs it takes off a bounded queue, so the
+    Slides calls overlap with reading and aligning the next songs.
+    The build is journaled under `inputs` (creator.start_deck_build): when an earlier build of the
+    same set failed part way, its deck is continued after the last committed batch.
+    Returns (presentation_id, list of songs).
+    """
+    q: "queue.Queue[Optional[List[Dict]]]" = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+    state = {"presentation_id": None, "error": None, "slides": 0, "complete": False}
+
+    def write():
+        key = None
+        try:
+            key, writer = creator.start_deck_build(template_id, inputs, resume=resume)
+            state["presentation_id"] = writer.presentation_id
+            while (pairs := q.get()) is not None:
+                writer.append(pairs)
+                state["slides"] += len(pairs)
+            if state["complete"]:
+                build_journal.finish(key, writer.committed)
+            else:
+                build_journal.fail(key, "interrupted before the last song")
+        except Exception as e:
+            state["error"] = e
+            if key:
+                build_journal.fail(key, f"{type(e).__name__}: {e}")
+            # keep taking songs off the queue so the producer never blocks
+            while q.get() is not None:
+                pass
+
+    writer_thread = threading.Thread(target=tracing.propagate(write), name="slides-writer", daemon=True)
+    writer_thread.start()
+    done = []
+    songs = iter(songs)
+    try:
+        # once the writer has failed, reading and aligning the remaining songs is wasted work
+        while state["error"] is None:
+            song = next(songs, None)
+            if song is None:
+                state["complete"] = True
+                break
+            done.append(song)
+            if song["pairs"]:
+                q.put(_tagged_pairs(song))
+    finally:
+        q.put(None)
+        writer_thread.join()
+    if state["error"] is not None:
+        raise state["error"]
+
+    creator.export_build_summary(state["presentation_id"], state["slides"])
+    return state["presentation_id"], done
+
+
+def playlist_titles(playlist_url: str) -> List[str]:
+    videos = retriever.preview_youtube_playlist(playlist_id_from_url(playlist_url))
+    if videos is None:
+        raise RuntimeError("Could not read the YouTube playlist")
+    return [v["title"] for v in videos]
+
+
+def _provided_song(lyrics: Dict[str, str]) -> Dict:
+    """
+    Pairs for lyrics supplied with the request; a missing language is translated by the model.
+    """
+    english, korean = lyrics.get("english", ""), lyrics.get("korean", "")
+    if english and not korean:
+        korean = translate(english, "korean")
+    elif korean and not english:
+        english = translate(korean, "english")
+    return song_pairs(english, korean)
+
+
+@tracing.traced
+def build_presentation(
+    playlist_url: str = "",
+    service: str = "sunday",
+    lyrics: Optional[Dict[str, Dict[str, str]]] = None,
+    allow_missing: bool = False,
+    engine: str = "slides",
+    folder_id: str = LYRICS_FOLDER_ID,
+    presentation_id: Optional[str] = None,
+    resume: bool = True,
+    titles: Optional[List[str]] = None,
+    cache: Optional[SongCache] = None,
+    progress: Optional[Callable[..., None]] = None,
+) -> Dict:
+    """
+    Playlist to deck without the agents: preview the playlist, match every title against the
+    lyrics folder, align each song and create the presentation from the Friday/Sunday template.
+    The model is only called for sections the aligner cannot pair and to translate lyrics passed
+    in `lyrics` ({playlist title: {'english', 'korean'}}) that only have one language.
+
+    Returns {'status': 'created' | 'missing_lyrics', 'presentation_url', 'songs', 'missing'}.
+    Songs that are neither in Drive nor in `lyrics` are listed under 'missing'; unless
+    allow_missing is set, no deck is built in that case.
+    With presentation_id, that deck is updated in place (update_presentation) instead of
+    creating a new one. Otherwise, with the slides engine, the deck is copied from the template
+    as soon as the set is known to be complete and each song's slides are written while the
+    next songs are still being read and aligned (_stream_to_deck). A song whose file cannot be
+    read by then is left out and reported under 'missing'.
+    A new deck is journaled (build_journal): rerunning a build that failed part way continues
+    the deck it started unless resume is False.
+    titles, when given, is the song list and the playlist is not read.
+    Builds sharing a SongCache match, read and align each song only once.
+    progress(stage, **details), when given, is called as the build moves through its stages
+    (playlist, matching, reading, aligning, creating, done), streamed builds included.
+    """
+    progress = progress or (lambda stage, **details: None)
+    service = service.lower()
+    if service not in TEMPLATES:
+        raise ValueError(f"service must be one of {sorted(TEMPLATES)}, not {service!r}")
+    lyrics = lyrics or {}
+    cache = cache or SongCache()
+
+    if titles is None:
+        progress("playlist")
+        titles = playlist_titles(playlist_url)
+
+    to_match = [t for t in titles if t not in lyrics]
+    progress("matching", songs=len(titles))
+    matches = cache.match(to_match, folder_id) if to_match else {}
+    if matches is None:
+        raise RuntimeError("Could not read the lyrics folder")
+
+    chosen = {}
+    for title in to_match:
+        candidates = matches.get(title) or []
+        if candidates and candidates[0]["score"] >= MIN_MATCH_SCORE:
+            chosen[title] = candidates[0]
+
+    missing = [
+        {"title": title, "candidates": (matches.get(title) or [])[:3]}
+        for title in titles if title not in lyrics and title not in chosen
+    ]
+    report = {"status": "missing_lyrics", "presentation_url": None, "songs": [], "missing": missing}
+    if missing and not allow_missing:
+        return report
+
+    progress("reading", files=len(chosen))
+    # one download per song, all in flight at once; songs are aligned in set order as their file arrives
+    reads = {
+        title: cache.memo(("read", match["id"]), lambda file_id=match["id"]: retriever._get_pool().submit(
+            tracing.propagate(retriever.read_lyrics_files), [file_id], folder_id
+        ))
+        for title, match in chosen.items()
+    }
+
+    def aligned_songs():
+        for done, title in enumerate(titles):
+            progress("aligning", song=done + 1, songs=len(titles))
+            if title in lyrics:
+                provided = lyrics[title]
+                song = cache.memo(("lyrics", provided.get("english", ""), provided.get("korean", "")),
+                                  lambda: _provided_song(provided))
+                yield {"title": title, "source": "request", **song}
+                continue
+            if title not in chosen:
+                continue
+            files = reads[title].result()
+            # None or [] (nothing read) or {'error': ...} (Drive failed)
+            if not isinstance(files, list) or not files or not files[0]["content"]:
+                logging.error(f"Could not read the lyrics file for {title!r}")
+                missing.append({"title": title, "candidates": [chosen[title]]})
+                continue
+            match = chosen[title]
+            song = cache.memo(("align", match["id"]), lambda: song_pairs(files[0]["content"]))
+            yield {"title": title, "source": "drive", "file": match["name"], "score": match["score"], **song}
+
+    try:
+        if presentation_id or engine != "slides":
+            songs = list(aligned_songs())
+            # the song title keeps each slide's id stable when songs are added, removed or reordered
+            text_pairs = [pair for s in songs for pair in _tagged_pairs(s)]
+            progress("creating", slides=len(text_pairs))
+            if presentation_id:
+                report["changes"] = creator.update_presentation(presentation_id, text_pairs)
+                report["presentation_url"] = creator.presentation_url(presentation_id)
+            else:
+                report["presentation_url"] = creator.create_presentation(
+                    text_pairs, TEMPLATES[service], engine, resume
+                )
+        else:
+            # what fixes the slides of the set: a resumed deck must not mix two versions of a file
+            inputs = {
+                "titles": titles,
+                "files": {
+                    title: [match["id"], (lyrics_index.get_file(match["id"]) or {}).get("modifiedTime")]
+                    for title, match in chosen.items()
+                },
+                "lyrics": lyrics,
+            }
+            def streamed_songs():
+                aligned = []
+                for song in aligned_songs():
+                    aligned.append(song)
+                    yield song
+                # every song is aligned; the writer is still committing the last slides
+                progress("creating", slides=sum(len(song["pairs"]) for song in aligned))
+
+            new_id, songs = _stream_to_deck(TEMPLATES[service], streamed_songs(), inputs, resume)
+            report["presentation_url"] = creator.presentation_url(new_id)
+    except HttpError as e:
+        raise RuntimeError(f"Could not create the presentation: {e}") from e
+
+    report["songs"] = [{k: v for k, v in s.items() if k != "pairs"} | {"slides": len(s["pairs"])} for s in songs]
+    report["status"] = "created"
+    progress("done", slides=sum(song["slides"] for song in report["songs"]))
+    return report
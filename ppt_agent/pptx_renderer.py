@@ -0,0 +1,96 @@
+import io
+from typing import Dict, List
+
+from pptx import Presentation
+from pptx.dml.color import RGBColor
+from pptx.enum.text import MSO_ANCHOR, PP_ALIGN
+from pptx.oxml.xmlchemy import OxmlElement
+from pptx.util import Pt
+
+
+PPTX_MIME = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+
+# Same look as lyric_slide_requests in agents/slide_creator_agent.py: black background,
+# two full-width 90pt boxes at the bottom of the slide.
+BOX_HEIGHT_PT = 90
+ENGLISH_STYLE = {
+    "offset_from_bottom_pt": 180, "anchor": MSO_ANCHOR.BOTTOM,
+    "font": "Arial Black", "size_pt": 26, "bold": False, "color": RGBColor(0xFF, 0xFF, 0x00),
+}
+KOREAN_STYLE = {
+    "offset_from_bottom_pt": 90, "anchor": MSO_ANCHOR.TOP,
+    "font": "Calibri", "size_pt": 30, "bold": True, "color": RGBColor(0xFF, 0xFF, 0xFF),
+}
+
+
+def _blank_layout(prs):
+    """
+    The template layout with the fewest placeholders (ideally none), preferring one named Blank.
+    """
+    return min(
+        prs.slide_layouts,
+        key=lambda layout: (len(layout.placeholders), layout.name.lower() != "blank"),
+    )
+
+
+def _set_typeface(run, typeface: str):
+    """
+    Set the run's font for every script. font.name only sets the latin typeface; Hangul would
+    otherwise be drawn in the theme's East Asian font, unlike the Slides output.
+    """
+    run.font.name = typeface
+    latin = run._r.get_or_add_rPr().get_or_add_latin()
+    # schema order is latin, ea, cs
+    for tag in ("a:cs", "a:ea"):
+        element = OxmlElement(tag)
+        element.set("typeface", typeface)
+        latin.addnext(element)
+
+
+def _add_text_box(slide, text: str, style: Dict, slide_width, slide_height):
+    top = slide_height - Pt(style["offset_from_bottom_pt"])
+    box = slide.shapes.add_textbox(0, top, slide_width, Pt(BOX_HEIGHT_PT))
+    frame = box.text_frame
+    frame.word_wrap = True
+    frame.vertical_anchor = style["anchor"]
+    for i, line in enumerate(text.split("\n")):
+        paragraph = frame.paragraphs[0] if i == 0 else frame.add_paragraph()
+        paragraph.alignment = PP_ALIGN.CENTER
+        run = paragraph.add_run()
+        run.text = line
+        _set_typeface(run, style["font"])
+        run.font.size = Pt(style["size_pt"])
+        run.font.bold = style["bold"]
+        run.font.color.rgb = style["color"]
+
+
+def render_deck(template: bytes, text_pairs: List[Dict[str, str]], insertion_index: int = 5) -> bytes:
+    """
+    Render the lyric slides into a copy of the template (.pptx bytes) and return the new .pptx.
+    Slides are placed at insertion_index, in order, like add_lyric_slides does through the API.
+    """
+    prs = Presentation(io.BytesIO(template))
+    layout = _blank_layout(prs)
+
+    for pair in text_pairs:
+        slide = prs.slides.add_slide(layout)
+        for placeholder in list(slide.placeholders):
+            placeholder.element.getparent().remove(placeholder.element)
+        fill = slide.background.fill
+        fill.solid()
+        fill.fore_color.rgb = RGBColor(0, 0, 0)
+        _add_text_box(slide, pair["english"], ENGLISH_STYLE, prs.slide_width, prs.slide_height)
+        _add_text_box(slide, pair["korean"], KOREAN_STYLE, prs.slide_width, prs.slide_height)
+
+    # add_slide appends; move the new slides to insertion_index
+    slide_ids = prs.slides._sldIdLst
+    new_ids = list(slide_ids)[len(slide_ids) - len(text_pairs):]
+    index = min(insertion_index, len(slide_ids) - len(text_pairs))
+    for el in new_ids:
+        slide_ids.remove(el)
+    for offset, el in enumerate(new_ids):
+        slide_ids.insert(index + offset, el)
+
+    out = io.BytesIO()
+    prs.save(out)
+    return out.getvalue()
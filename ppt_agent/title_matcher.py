@@ -0,0 +1,199 @@
+import heapq
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Tuple
+
+
+# Hangul syllables are composed arithmetically: 0xAC00 + (lead * 21 + vowel) * 28 + tail
+_HANGUL_BASE = 0xAC00
+_HANGUL_LAST = 0xD7A3
+_LEADS = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_VOWELS = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+_TAILS = ["", "ㄱ", "ㄲ", "ㄳ", "ㄴ", "ㄵ", "ㄶ", "ㄷ", "ㄹ", "ㄺ", "ㄻ", "ㄼ", "ㄽ", "ㄾ", "ㄿ", "ㅀ",
+          "ㅁ", "ㅂ", "ㅄ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ"]
+
+# Revised Romanization, simplified (no sound-change rules - enough for fuzzy matching)
+_ROMAN_LEADS = ["g", "kk", "n", "d", "tt", "r", "m", "b", "pp", "s", "ss", "", "j", "jj", "ch", "k", "t", "p", "h"]
+_ROMAN_VOWELS = ["a", "ae", "ya", "yae", "eo", "e", "yeo", "ye", "o", "wa", "wae", "oe", "yo", "u", "wo", "we",
+                 "wi", "yu", "eu", "ui", "i"]
+_ROMAN_TAILS = ["", "k", "k", "k", "n", "n", "n", "t", "l", "k", "m", "l", "l", "l", "p", "l",
+                "m", "p", "p", "t", "t", "ng", "t", "t", "k", "t", "p", "t"]
+
+# YouTube title noise: bracketed tags, "Official MV", "live", lyric-video markers, channel names after a pipe
+_NOISE_PATTERNS = [
+    r"\[[^\]]*\]",
+    r"\([^)]*\)",
+    r"【[^】]*】",
+    r"\|.*$",
+    r"(?i)\bofficial\s*(music\s*)?(video|mv|audio)\b",
+    r"(?i)\b(lyric|lyrics)\s*video\b",
+    r"(?i)\b(m/?v|live|cover|ver(sion)?\.?)\b",
+    r"(?i)\bfeat\.?.*$",
+    r"가사|라이브|공식",
+]
+
+NGRAM = 3
+MIN_SCORE = 0.2
+
+
+def decompose_hangul(text: str) -> str:
+    """
+    Split precomposed Hangul syllables into their compatibility jamo ("주은혜" -> "ㅈㅜㅇㅡㄴㅎㅖ").
+    Other characters pass through unchanged.
+    """
+    out = []
+    for ch in text:
+        code = ord(ch)
+        if _HANGUL_BASE <= code <= _HANGUL_LAST:
+            offset = code - _HANGUL_BASE
+            out.append(_LEADS[offset // 588])
+            out.append(_VOWELS[(offset % 588) // 28])
+            out.append(_TAILS[offset % 28])
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def romanize(text: str) -> str:
+    """
+    Romanize Hangul syllables (simplified Revised Romanization); other characters pass through.
+    """
+    out = []
+    for ch in text:
+        code = ord(ch)
+        if _HANGUL_BASE <= code <= _HANGUL_LAST:
+            offset = code - _HANGUL_BASE
+            out.append(_ROMAN_LEADS[offset // 588])
+            out.append(_ROMAN_VOWELS[(offset % 588) // 28])
+            out.append(_ROMAN_TAILS[offset % 28])
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def _strip_noise(title: str) -> str:
+    text = unicodedata.normalize("NFC", title or "")
+    for pattern in _NOISE_PATTERNS:
+        text = re.sub(pattern, " ", text)
+    return text
+
+
+def clean_title(title: str) -> str:
+    """
+    Strip YouTube noise (tags in brackets, "Official MV", channel suffixes) and punctuation from a title.
+    """
+    text = re.sub(r"[^0-9A-Za-z가-힣\s]", " ", _strip_noise(title))
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def title_variants(title: str) -> List[str]:
+    """
+    The title, plus each part of an "Artist - Title" (or "Title - Artist") title on its own.
+    Which part is the song varies, so the matcher scores every variant and keeps the best.
+    """
+    parts = [p for p in re.split(r"\s[-–—]\s", _strip_noise(title)) if p.strip()]
+    variants = [title] + (parts if len(parts) > 1 else [])
+    return list(dict.fromkeys(v for v in variants if clean_title(v)))
+
+
+def _grams(title: str) -> List[str]:
+    """
+    Character n-grams over the spacing-free jamo form and the romanized form of a title,
+    so "주 은혜" and "주은혜" (or a one-letter typo) still share most of their grams.
+    """
+    grams = []
+    cleaned = clean_title(title)
+    for form in (decompose_hangul(cleaned), romanize(cleaned)):
+        compact = form.replace(" ", "")
+        if not compact:
+            continue
+        padded = f"^{compact}$"
+        if len(padded) <= NGRAM:
+            grams.append(padded)
+        else:
+            grams.extend(padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1))
+    return grams
+
+
+class TitleMatcher:
+    """
+    N-gram index over a set of file names. Titles are matched with cosine similarity of
+    TF-IDF weighted n-gram vectors, stored sparsely as postings (gram -> the name variants
+    holding it), so a title is only scored against the names it shares a gram with.
+    """
+
+    def __init__(self, files: List[Dict]):
+        """
+        files: [{'id', 'name', ...}] - the candidates (e.g. the lyrics folder listing).
+        A name like "주 은혜 놀라워 / Amazing Grace" is indexed as the whole name and as each
+        side of the slash, so a title in either language can match it fully.
+        """
+        self.files = list(files)
+        self.row_file: List[int] = []
+        rows: List[Counter] = []
+        for i, f in enumerate(self.files):
+            name = f.get("name") or ""
+            variants = [name] + [part for part in name.split("/") if part.strip()]
+            for variant in dict.fromkeys(variants):
+                self.row_file.append(i)
+                rows.append(Counter(_grams(variant)))
+
+        # grams that appear in many names ("^ㅈ", "eo") say little about which song it is
+        df = Counter(g for counts in rows for g in counts)
+        self.idf = {g: math.log((1 + len(rows)) / (1 + n)) + 1.0 for g, n in df.items()}
+        self.max_idf = max(self.idf.values(), default=1.0)
+
+        self.postings: Dict[str, List[Tuple[int, float]]] = {}
+        for r, counts in enumerate(rows):
+            vector = self._normalize({g: c * self.idf[g] for g, c in counts.items()})
+            for g, w in vector.items():
+                self.postings.setdefault(g, []).append((r, w))
+
+    @staticmethod
+    def _normalize(vector: Dict[str, float], extra: float = 0.0) -> Dict[str, float]:
+        norm = math.sqrt(sum(w * w for w in vector.values()) + extra)
+        return {g: w / norm for g, w in vector.items()} if norm else {}
+
+    def _query_vector(self, title: str) -> Dict[str, float]:
+        counts = Counter(_grams(title))
+        # grams unknown to the index still count towards the query length, so a
+        # title that mostly doesn't match can't score as a perfect hit
+        unknown = sum(c for g, c in counts.items() if g not in self.idf)
+        return self._normalize(
+            {g: c * self.idf[g] for g, c in counts.items() if g in self.idf}, unknown * self.max_idf ** 2
+        )
+
+    def _scores(self, title: str) -> Dict[int, float]:
+        """
+        Best score per file over every variant of title and every variant of the file's name.
+        """
+        best: Dict[int, float] = {}
+        for variant in title_variants(title) or [title]:
+            row_scores: Dict[int, float] = {}
+            for g, qw in self._query_vector(variant).items():
+                for r, w in self.postings[g]:
+                    row_scores[r] = row_scores.get(r, 0.0) + qw * w
+            for r, score in row_scores.items():
+                f = self.row_file[r]
+                if score > best.get(f, 0.0):
+                    best[f] = score
+        return best
+
+    def match(self, titles: List[str], limit: int = 5, min_score: float = MIN_SCORE) -> Dict[str, List[Dict]]:
+        """
+        Rank the indexed files for every title.
+        Returns {title: [{'id', 'name', 'score'}, ...]} best first, scores in [0, 1].
+        """
+        out = {}
+        for title in titles:
+            scores = {f: round(min(score, 1.0), 3) for f, score in self._scores(title).items()}
+            # equal scores keep the order of files
+            ranked = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+            out[title] = [
+                {"id": self.files[f]["id"], "name": self.files[f].get("name"), "score": score}
+                for f, score in ranked
+                if score >= min_score
+            ]
+        return out
@@ -0,0 +1,247 @@
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict, deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+# Spans are appended here as JSON lines, named after the OTLP/JSON span fields.
+TRACE_FILE = os.environ.get("PPT_AGENT_TRACE_FILE", "./ppt_agent/traces.jsonl")
+MAX_TRACES_IN_MEMORY = 50  # most recent traces whose finished spans are kept for summaries
+# Finished spans kept per trace; the oldest are dropped. A span finishes after its children, so
+# every kept span keeps its parents, and a long build's summary covers its most recent spans.
+MAX_SPANS_PER_TRACE = 5000
+
+_trace_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("ppt_agent_trace_id", default=None)
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("ppt_agent_span", default=None)
+
+_write_lock = threading.Lock()
+_finished: "OrderedDict[str, deque]" = OrderedDict()
+_open_model_spans: Dict[tuple, "Span"] = {}
+
+
+class Span:
+    def __init__(self, name: str, kind: str, attributes: Optional[Dict] = None):
+        parent = _current.get()
+        self.trace_id = _trace_id.get() or (parent.trace_id if parent else uuid.uuid4().hex)
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.status = "OK"
+        self.start_ns = time.time_ns()
+        self._start = time.perf_counter()
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add(self, key: str, amount):
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def end(self, error: Optional[BaseException] = None):
+        if error is not None:
+            self.status = "ERROR"
+            self.attributes.setdefault("error", f"{type(error).__name__}: {error}")
+        self.attributes["latency_ms"] = round((time.perf_counter() - self._start) * 1000, 2)
+        record = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": time.time_ns(),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+        _export(record)
+
+
+def _export(record: Dict):
+    with _write_lock:
+        spans = _finished.get(record["traceId"])
+        if spans is None:
+            spans = _finished[record["traceId"]] = deque(maxlen=MAX_SPANS_PER_TRACE)
+        spans.append(record)
+        _finished.move_to_end(record["traceId"])
+        while len(_finished) > MAX_TRACES_IN_MEMORY:
+            _finished.popitem(last=False)
+        if not TRACE_FILE:
+            return
+        try:
+            with open(TRACE_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        except OSError as e:
+            logging.warning(f"Could not write trace span: {e}")
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes):
+    """
+    Time a block of work as a span; nested spans become its children.
+    """
+    s = Span(name, kind, attributes)
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.end(e)
+        raise
+    else:
+        s.end()
+    finally:
+        _current.reset(token)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def current_trace_id() -> Optional[str]:
+    s = _current.get()
+    return s.trace_id if s else _trace_id.get()
+
+
+def traced(func):
+    """
+    Decorator for agent tools: runs every call inside a 'tool' span.
+    functools.wraps keeps the name, docstring and signature ADK reads to declare the tool.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with span(func.__name__, kind="tool"):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def propagate(func):
+    """
+    Bind func to a copy of the current context so spans started from a pool thread keep
+    their parent and trace id. Make one wrapper per submitted task: a context can only be
+    entered by one thread at a time.
+    """
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.run(func, *args, **kwargs)
+
+
+# --- ADK callbacks: tie spans to the agent invocation ---
+
+def bind_root_invocation(callback_context):
+    """
+    before_agent_callback of the root agent: every invocation of it starts a new trace, with the
+    ADK invocation id as trace id, even when the context still holds the previous one's.
+    """
+    _trace_id.set(callback_context.invocation_id)
+    return None
+
+
+def bind_invocation(callback_context):
+    """
+    before_agent_callback of the sub-agents. Called through AgentTool, a sub-agent runs in an
+    invocation of its own inside the root's, and its spans stay in the root's trace. Run on its
+    own, it starts a trace for its invocation.
+    """
+    if _trace_id.get() is None:
+        _trace_id.set(callback_context.invocation_id)
+    return None
+
+
+def before_model(callback_context, llm_request):
+    """
+    before_model_callback: open a span for one model turn (in the trace bound by the agent callbacks).
+    """
+    if _trace_id.get() is None:
+        _trace_id.set(callback_context.invocation_id)
+    s = Span(f"model:{callback_context.agent_name}", "model",
+             {"agent": callback_context.agent_name, "model": getattr(llm_request, "model", None)})
+    _open_model_spans[(callback_context.invocation_id, callback_context.agent_name)] = s
+    return None
+
+
+def after_model(callback_context, llm_response):
+    """
+    after_model_callback: close the model turn span, recording token usage when reported.
+    """
+    s = _open_model_spans.pop((callback_context.invocation_id, callback_context.agent_name), None)
+    if s is not None:
+        usage = getattr(llm_response, "usage_metadata", None)
+        if usage is not None:
+            s.set(prompt_tokens=getattr(usage, "prompt_token_count", None),
+                  output_tokens=getattr(usage, "candidates_token_count", None))
+        s.end()
+    return None
+
+
+# --- reports ---
+
+def spans_for(trace_id: str) -> List[Dict]:
+    with _write_lock:
+        return list(_finished.get(trace_id, []))
+
+
+def summarize(trace_id: str, root_span_id: Optional[str] = None) -> Dict:
+    """
+    Aggregate the API spans of a trace (optionally only those under root_span_id):
+    {'api_calls', 'api_ms', 'bytes', 'retries', 'quota_errors', 'throttled_ms', 'methods': {method: {...}}}
+    """
+    spans = spans_for(trace_id)
+    if root_span_id:
+        children = defaultdict(list)
+        for s in spans:
+            children[s["parentSpanId"]].append(s)
+        keep, stack = [], [root_span_id]
+        while stack:
+            for child in children.get(stack.pop(), []):
+                keep.append(child)
+                stack.append(child["spanId"])
+        spans = keep
+
+    methods: Dict[str, Dict] = {}
+    for s in spans:
+        if s["kind"] != "api":
+            continue
+        a = s["attributes"]
+        m = methods.setdefault(s["name"], {"calls": 0, "ms": 0.0, "bytes": 0, "retries": 0, "quota_errors": 0,
+                                           "throttled_ms": 0.0})
+        m["calls"] += 1
+        m["ms"] = round(m["ms"] + a.get("latency_ms", 0), 2)
+        m["bytes"] += a.get("response_bytes", 0)
+        m["retries"] += a.get("retries", 0)
+        m["quota_errors"] += a.get("quota_errors", 0)
+        m["throttled_ms"] = round(m["throttled_ms"] + a.get("throttled_ms", 0), 2)
+
+    return {
+        "trace_id": trace_id,
+        "api_calls": sum(m["calls"] for m in methods.values()),
+        "api_ms": round(sum(m["ms"] for m in methods.values()), 2),
+        "bytes": sum(m["bytes"] for m in methods.values()),
+        "retries": sum(m["retries"] for m in methods.values()),
+        "quota_errors": sum(m["quota_errors"] for m in methods.values()),
+        "throttled_ms": round(sum(m["throttled_ms"] for m in methods.values()), 2),
+        "methods": methods,
+    }
+
+
+def export_summary(summary: Dict):
+    """
+    Log a build summary and append it to the trace file as a 'summary' record.
+    """
+    logging.info(
+        f"Build summary: {summary['api_calls']} API calls, {summary['api_ms']} ms, "
+        f"{summary['bytes']} bytes, {summary['retries']} retries, {summary['quota_errors']} quota errors"
+    )
+    if not TRACE_FILE:
+        return
+    with _write_lock:
+        try:
+            with open(TRACE_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"kind": "summary", **summary}, ensure_ascii=False, default=str) + "\n")
+        except OSError as e:
+            logging.warning(f"Could not write build summary: {e}")